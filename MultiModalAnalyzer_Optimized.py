@@ -6,72 +6,225 @@ MultiModalAnalyzer_Optimized.py - 优化的多模态分析系统
 修复版本 - 解决了变量作用域和依赖问题
 """
 
+from array import array
+import bisect
+from collections import Counter
+import functools
+import hashlib
 import json
+import importlib.util
 import os
-import cv2
+import pickle
+import queue
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 import statistics
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import multiprocessing
 import logging
 import subprocess
 import traceback
 
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 重量级依赖（cv2）按需导入，避免导入模块时的初始化开销
+cv2 = None
+
+def _cv2():
+    """按需导入cv2"""
+    global cv2
+    if cv2 is None:
+        import cv2 as _cv2_module
+        cv2 = _cv2_module
+    return cv2
+
+# numba可选：首次调用时才导入并JIT编译，未安装时退回纯Python实现
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+def _njit(func):
+    """按需JIT编译数值内核（numba不可用时原样返回）"""
+    if not HAS_NUMBA:
+        return func
+    
+    compiled = None
+    
+    @functools.wraps(func)
+    def wrapper(*args):
+        nonlocal compiled
+        if compiled is None:
+            import numba
+            compiled = numba.njit(cache=True)(func)
+        return compiled(*args)
+    
+    return wrapper
+
 # 尝试导入可选依赖
+HAS_THREADPOOLCTL = importlib.util.find_spec("threadpoolctl") is not None
+
 try:
-    import librosa
-    HAS_LIBROSA = True
+    import soundfile as sf
+    HAS_SOUNDFILE = True
 except ImportError:
-    HAS_LIBROSA = False
-    print("⚠️ librosa未安装，音频分析功能受限")
+    HAS_SOUNDFILE = False
+    logger.warning("⚠️ soundfile未安装，使用ffprobe获取音频时长")
 
 try:
     from AliyunASRClient import QwenASRClient
     HAS_ASR_CLIENT = True
 except ImportError:
     HAS_ASR_CLIENT = False
-    print("⚠️ AliyunASRClient未找到，使用模拟ASR")
+    logger.warning("⚠️ AliyunASRClient未找到，使用模拟ASR")
 
 try:
     from FacialAnalyzer import FacialAnalyzer
     HAS_FACIAL_ANALYZER = True
 except ImportError:
     HAS_FACIAL_ANALYZER = False
-    print("⚠️ FacialAnalyzer未找到，使用简化人脸分析")
+    logger.warning("⚠️ FacialAnalyzer未找到，使用简化人脸分析")
 
 try:
     from ProsodyAnalyzer_Pro import ProsodyAnalyzer
     HAS_PROSODY_ANALYZER = True
 except ImportError:
     HAS_PROSODY_ANALYZER = False
-    print("⚠️ ProsodyAnalyzer未找到，使用简化韵律分析")
+    logger.warning("⚠️ ProsodyAnalyzer未找到，使用简化韵律分析")
 
 try:
     from PauseDetector import PauseDetector
     HAS_PAUSE_DETECTOR = True
 except ImportError:
     HAS_PAUSE_DETECTOR = False
-    print("⚠️ PauseDetector未找到，使用简化VAD")
+    logger.warning("⚠️ PauseDetector未找到，使用简化VAD")
 
 try:
     from EventDrivenDetector import LightweightDetector, EventDrivenCache
     HAS_EVENT_DETECTOR = True
 except ImportError:
     HAS_EVENT_DETECTOR = False
-    print("⚠️ EventDrivenDetector未找到，使用默认实现")
+    logger.warning("⚠️ EventDrivenDetector未找到，使用默认实现")
 
 try:
     from TimeAlignment import snap_to_silence
     HAS_TIME_ALIGNMENT = True
 except ImportError:
     HAS_TIME_ALIGNMENT = False
-    print("⚠️ TimeAlignment未找到，跳过时间对齐")
+    logger.warning("⚠️ TimeAlignment未找到，跳过时间对齐")
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# =============================================================================
+# 公共工具函数
+# =============================================================================
+
+# ffprobe时长查询的固定参数，调用时只追加文件路径
+_FFPROBE_DURATION_CMD = (
+    'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+    '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1'
+)
+
+def _probe_duration(audio_path: str) -> float:
+    """获取音频时长：按 (路径, 修改时间, 大小) 缓存，文件被覆盖后重新探测"""
+    try:
+        st = os.stat(audio_path)
+        return _probe_duration_cached(audio_path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return _probe_duration_cached(audio_path, None, None)
+
+@functools.lru_cache(maxsize=256)
+def _probe_duration_cached(audio_path: str, mtime_ns: Optional[int], size: Optional[int]) -> float:
+    """获取音频时长：soundfile -> ffprobe -> 默认30秒（mtime_ns/size仅用作缓存键）"""
+    if HAS_SOUNDFILE:
+        try:
+            # 只读文件头，避免整段解码
+            return sf.info(audio_path).duration
+        except Exception:
+            pass
+    
+    try:
+        result = subprocess.run(
+            [*_FFPROBE_DURATION_CMD, audio_path],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, check=True, timeout=10
+        )
+        return float(result.stdout.strip())
+    except Exception as e:
+        logger.warning(f"ffprobe获取时长失败: {e}")
+        return 30.0
+
+# YuNet INT8人脸检测模型（OpenCV Zoo），可通过环境变量指定路径
+YUNET_MODEL_PATH = os.environ.get("YUNET_MODEL_PATH", "face_detection_yunet_2023mar_int8.onnx")
+
+# 人脸检测输入尺寸 (宽, 高)
+_FACE_INPUT_SIZE = (320, 240)
+
+# 预计算面部特征的列顺序：每个特征占 (mean, std) 两列
+_FACE_KEYS = ("Smile", "Mouth", "EAR", "Brow", "Yaw", "Pitch", "Roll", "FaceSize")
+_FACE_FEAT_COLS = 2 * len(_FACE_KEYS)
+
+def _landmark_features(face: np.ndarray, width: int, height: int) -> Dict:
+    """由YuNet检测结果（框 + 右眼/左眼/鼻尖/右嘴角/左嘴角）计算面部特征（mean, std格式）"""
+    x, y, w, h = face[:4]
+    right_eye, left_eye, nose, mouth_r, mouth_l = face[4:14].reshape(5, 2)
+    
+    eye_vec = left_eye - right_eye
+    eye_dist = max(float(np.hypot(*eye_vec)), 1e-6)
+    eye_mid = (right_eye + left_eye) / 2
+    mouth_mid = (mouth_r + mouth_l) / 2
+    
+    # 嘴角间距相对眼距：微笑时嘴角外扩
+    mouth_width = float(np.hypot(*(mouth_l - mouth_r))) / eye_dist
+    smile = float(np.clip((mouth_width - 0.7) / 0.5, 0.0, 1.0))
+    # 嘴部中心到鼻尖的垂直距离（相对人脸高度）：张嘴时下移
+    mouth_open = float(mouth_mid[1] - nose[1]) / max(float(h), 1e-6)
+    # 鼻尖相对双眼中点的水平偏移 -> 偏航；眼睛连线角度 -> 翻滚
+    yaw = float(nose[0] - eye_mid[0]) / eye_dist * 90.0
+    roll = float(np.degrees(np.arctan2(eye_vec[1], eye_vec[0])))
+    pitch = ((y + h / 2) / height) * 20 - 10
+    
+    return {
+        "Smile": [smile, 0.1],
+        "Mouth": [mouth_open, 0.1],
+        "EAR": [0.25, 0.05],     # 5点关键点不含眼睑，保持默认值
+        "Brow": [0.1, 0.02],     # 同上，不含眉毛关键点
+        "Yaw": [yaw, 2.0],
+        "Pitch": [float(pitch), 2.0],
+        "Roll": [roll, 1.0],
+        "FaceSize": [float(w * h) / (width * height), 0.1]
+    }
+
+# ffprobe音轨编码查询：首条音轨的编码/采样率/声道数
+_FFPROBE_CODEC_CMD = (
+    'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+    '-show_entries', 'stream=codec_name,sample_rate,channels', '-of', 'json'
+)
+
+def _probe_audio_codec(media_path: str) -> Dict:
+    """获取首条音轨的编码信息，失败时返回空字典"""
+    try:
+        result = subprocess.run(
+            [*_FFPROBE_CODEC_CMD, media_path],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, check=True, timeout=10
+        )
+        stream = (json.loads(result.stdout).get("streams") or [{}])[0]
+        return {
+            "codec_name": stream.get("codec_name", ""),
+            "sample_rate": int(stream.get("sample_rate", 0)),
+            "channels": int(stream.get("channels", 0))
+        }
+    except Exception as e:
+        logger.warning(f"ffprobe获取音轨编码失败: {e}")
+        return {}
+
+def _content_key(path: str) -> str:
+    """廉价的文件内容键：前1MB内容 + 文件大小的sha1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(1 << 20))
+    digest.update(str(os.path.getsize(path)).encode())
+    return digest.hexdigest()
 
 # =============================================================================
 # 默认实现类（当依赖不可用时使用）
@@ -82,72 +235,80 @@ class MockASRClient:
     def transcribe_and_segment(self, audio_path: str) -> List[Dict]:
         logger.info("🤖 使用模拟ASR分段")
         # 模拟分段：假设每3秒一个段落
-        try:
-            if HAS_LIBROSA:
-                y, sr = librosa.load(audio_path, sr=None)
-                duration = len(y) / sr
-            else:
-                # 使用ffprobe获取时长
-                duration = self._get_duration_ffprobe(audio_path)
-        except:
-            duration = 30.0  # 默认30秒
-        
-        segments = []
-        for i in range(0, int(duration), 3):
-            segments.append({
-                "text": f"模拟语音段落{len(segments)+1}",
-                "start_ms": i * 1000,
-                "end_ms": min((i + 3) * 1000, int(duration * 1000)),
+        duration = _probe_duration(audio_path)
+        
+        # 段落边界用NumPy一次算出，循环只负责构建字典
+        starts = np.arange(0, int(duration), 3, dtype=np.int64) * 1000
+        ends = np.minimum(starts + 3000, int(duration * 1000))
+        
+        return [
+            {
+                "text": f"模拟语音段落{i+1}",
+                "start_ms": start_ms,
+                "end_ms": end_ms,
                 "source": "MOCK_ASR",
                 "punct": "。"
-            })
-        
-        return segments
-    
-    def _get_duration_ffprobe(self, audio_path: str) -> float:
-        """使用ffprobe获取音频时长"""
-        try:
-            cmd = [
-                'ffprobe', '-i', audio_path, '-show_entries', 
-                'format=duration', '-v', 'quiet', '-of', 'csv=p=0'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return float(result.stdout.strip())
-        except:
-            return 30.0
+            }
+            for i, (start_ms, end_ms) in enumerate(zip(starts.tolist(), ends.tolist()))
+        ]
+
+# 模拟面部特征常量（mean, std），所有段落共享同一对象，调用方需视为只读
+_MOCK_FACE = {
+    "Smile": (0.5, 0.1),
+    "Mouth": (0.3, 0.1),
+    "EAR": (0.25, 0.05),
+    "Brow": (0.1, 0.02),
+    "Yaw": (0.0, 2.0),
+    "Pitch": (0.0, 2.0),
+    "Roll": (0.0, 1.0),
+    "FaceSize": (0.2, 0.05)
+}
 
 class MockFacialAnalyzer:
     """模拟面部分析器"""
     @staticmethod
     def analyze_segment(video_path: str, start_ms: int, end_ms: int) -> Dict:
-        logger.debug(f"🎭 模拟面部分析 {start_ms}-{end_ms}ms")
-        return {
-            "Smile": [0.5, 0.1],
-            "Mouth": [0.3, 0.1],
-            "EAR": [0.25, 0.05],
-            "Brow": [0.1, 0.02],
-            "Yaw": [0.0, 2.0],
-            "Pitch": [0.0, 2.0],
-            "Roll": [0.0, 1.0],
-            "FaceSize": [0.2, 0.05]
-        }
+        logger.debug("🎭 模拟面部分析 %s-%sms", start_ms, end_ms)
+        return _MOCK_FACE
+
+@_njit
+def _greedy_split_points(candidates: np.ndarray, start_s: float, min_len_s: float) -> np.ndarray:
+    """按顺序贪心选取分割点，保证每个分割点距上一个分割点（或start_s）大于min_len_s"""
+    out = np.empty(candidates.shape[0], dtype=np.float64)
+    n = 0
+    prev = start_s
+    for i in range(candidates.shape[0]):
+        t = candidates[i]
+        if t - prev > min_len_s:
+            out[n] = t
+            n += 1
+            prev = t
+    return out[:n]
+
+@functools.lru_cache(maxsize=8)
+def _unit_phase(n_points: int) -> np.ndarray:
+    """[0, 2π] 上均匀分布的只读相位数组"""
+    phase = (2 * np.pi * np.linspace(0.0, 1.0, n_points)).astype(np.float32)
+    phase.setflags(write=False)
+    return phase
 
 class MockProsodyAnalyzer:
     """模拟韵律分析器"""
     @staticmethod
     def analyze_segment(audio_path: str, start_ms: int, end_ms: int, n_points: int = 15) -> Dict:
-        logger.debug(f"🎵 模拟韵律分析 {start_ms}-{end_ms}ms")
+        logger.debug("🎵 模拟韵律分析 %s-%sms", start_ms, end_ms)
         # 生成模拟的韵律数据
-        duration_s = (end_ms - start_ms) / 1000.0
-        time_points = np.linspace(0, duration_s, n_points)
+        # 相位 2π·t/duration 与段落时长无关，按n_points缓存复用
+        phase = _unit_phase(n_points)
         
         # 模拟基频变化
-        pitch = 200 + 50 * np.sin(2 * np.pi * time_points / duration_s * 2)
+        pitch = 200 + 50 * np.sin(2 * phase)
         # 模拟语速变化
-        rate = 1.0 + 0.2 * np.sin(2 * np.pi * time_points / duration_s * 3)
+        rate = 1.0 + 0.2 * np.sin(3 * phase)
         # 模拟音量变化
-        level = 0.7 + 0.2 * np.sin(2 * np.pi * time_points / duration_s * 1.5)
+        level = 0.7 + 0.2 * np.sin(1.5 * phase)
         
+        # 结果需要JSON序列化，仅在边界处转换为list
         return {
             "pitch": pitch.tolist(),
             "rate": rate.tolist(),
@@ -156,62 +317,58 @@ class MockProsodyAnalyzer:
 
 class MockPauseDetector:
     """模拟暂停检测器"""
+    def __init__(self):
+        self._rng = np.random.default_rng()
+    
     def detect_pauses_from_file(self, audio_path: str) -> Dict:
         logger.info("⏸️ 模拟VAD检测")
-        try:
-            if HAS_LIBROSA:
-                y, sr = librosa.load(audio_path, sr=None)
-                duration = len(y) / sr
-            else:
-                duration = self._get_duration_ffprobe(audio_path)
-        except:
-            duration = 30.0
+        duration = _probe_duration(audio_path)
+        
+        # 模拟语音段（2-4秒）和暂停段（0.3-0.8秒）交替出现
+        # 每对至少2.3秒，预先批量生成足够覆盖整段音频的时长
+        n_pairs = int(duration / 2.3) + 1
+        durations = np.empty(2 * n_pairs)
+        durations[0::2] = self._rng.uniform(2.0, 4.0, n_pairs)
+        durations[1::2] = self._rng.uniform(0.3, 0.8, n_pairs)
+        
+        bounds = np.minimum(np.concatenate(([0.0], np.cumsum(durations))), duration)
+        n_valid = int(np.count_nonzero(bounds[:-1] < duration))
         
-        # 模拟语音段和暂停段
         speech_segments = []
         pause_segments = []
-        
-        current_time = 0
-        while current_time < duration:
-            # 语音段：2-4秒
-            speech_duration = np.random.uniform(2.0, 4.0)
-            speech_end = min(current_time + speech_duration, duration)
-            speech_segments.append({
-                'start_time': current_time,
-                'end_time': speech_end
+        for j, (start, end) in enumerate(zip(bounds[:n_valid].tolist(), bounds[1:n_valid + 1].tolist())):
+            target = speech_segments if j % 2 == 0 else pause_segments
+            target.append({
+                'start_time': start,
+                'end_time': end
             })
-            current_time = speech_end
-            
-            # 暂停段：0.3-0.8秒
-            if current_time < duration:
-                pause_duration = np.random.uniform(0.3, 0.8)
-                pause_end = min(current_time + pause_duration, duration)
-                pause_segments.append({
-                    'start_time': current_time,
-                    'end_time': pause_end
-                })
-                current_time = pause_end
         
         return {
             'speech_segments': speech_segments,
             'pause_segments': pause_segments
         }
-    
-    def _get_duration_ffprobe(self, audio_path: str) -> float:
-        """使用ffprobe获取音频时长"""
-        try:
-            cmd = [
-                'ffprobe', '-i', audio_path, '-show_entries', 
-                'format=duration', '-v', 'quiet', '-of', 'csv=p=0'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return float(result.stdout.strip())
-        except:
-            return 30.0
 
 class LightweightDetector:
     """轻量级事件检测器的默认实现"""
     
+    RAND_BUFFER_SIZE = 65536
+    MOTION_THRESHOLD = 0.08  # 相邻采样帧平均灰度差（0-1）超过该值视为画面变化
+    
+    def __init__(self):
+        # 独立的随机数生成器 + 预生成缓冲区，摊薄每次调用的开销
+        self._rng = np.random.default_rng()
+        self._rand_buf = self._rng.random(self.RAND_BUFFER_SIZE)
+        self._rand_idx = 0
+    
+    def _rand(self) -> float:
+        """从预生成缓冲区取一个[0, 1)均匀随机数，用尽时重新填充"""
+        if self._rand_idx >= self.RAND_BUFFER_SIZE:
+            self._rand_buf = self._rng.random(self.RAND_BUFFER_SIZE)
+            self._rand_idx = 0
+        value = self._rand_buf[self._rand_idx]
+        self._rand_idx += 1
+        return value
+    
     def precompute_audio_features(self, audio_path: str) -> Dict:
         """预计算音频特征"""
         logger.info("🎯 预计算音频特征（轻量版）")
@@ -224,7 +381,7 @@ class LightweightDetector:
         """检测音频事件"""
         # 简单的随机事件生成
         events = []
-        if np.random.random() > 0.7:  # 30%概率有事件
+        if self._rand() > 0.7:  # 30%概率有事件
             events.append({
                 "type": "audio_change",
                 "timestamp": (start_s + end_s) / 2,
@@ -232,98 +389,198 @@ class LightweightDetector:
             })
         return events
     
-    def detect_video_events(self, video_path: str, start_frame: int, end_frame: int) -> List[Dict]:
-        """检测视频事件"""
+    def detect_video_events(self, precomputed_video: Dict, start_frame: int, end_frame: int) -> List[Dict]:
+        """检测视频事件（基于预计算的逐帧运动量）"""
         events = []
-        if np.random.random() > 0.6:  # 40%概率有事件
+        motion = precomputed_video.get("frame_events")
+        if motion is None or len(motion) == 0:
+            # 无预计算运动量时退回随机事件
+            if self._rand() > 0.6:  # 40%概率有事件
+                events.append({
+                    "type": "visual_change",
+                    "frame": (start_frame + end_frame) // 2,
+                    "confidence": 0.7
+                })
+            return events
+        
+        window = motion[start_frame:end_frame]
+        if len(window) and window.max() > self.MOTION_THRESHOLD:
+            peak = int(window.argmax())
             events.append({
                 "type": "visual_change",
-                "frame": (start_frame + end_frame) // 2,
-                "confidence": 0.7
+                "frame": start_frame + peak,
+                "confidence": min(1.0, float(window[peak]) / (2 * self.MOTION_THRESHOLD))
             })
         return events
     
     def should_trigger_analysis(self, events: List[Dict], timestamp: float) -> Dict:
         """判断是否触发分析"""
-        # 简单策略：有事件就触发
-        should_trigger = len(events) > 0 or np.random.random() > 0.5  # 50%概率触发
-        
-        reasons = []
-        if len(events) > 0:
-            reasons.append(f"detected_{len(events)}_events")
-        if should_trigger and not reasons:
-            reasons.append("random_trigger")
+        # 简单策略：有事件就触发（跳过随机数）
+        if events:
+            return {
+                "should_trigger": True,
+                "reasons": [f"detected_{len(events)}_events"]
+            }
         
+        should_trigger = self._rand() > 0.5  # 50%概率触发
         return {
             "should_trigger": should_trigger,
-            "reasons": reasons
+            "reasons": ["random_trigger"] if should_trigger else []
         }
 
 class EventDrivenCache:
-    """事件驱动缓存的默认实现"""
+    """事件驱动缓存的默认实现
     
-    def __init__(self):
-        self.audio_cache = {}
-        self.video_cache = {}
+    时间戳与特征分列存储（SoA）：时间戳保存在有序的连续double数组中，
+    特征保存在平行列表中，按下标对应。
+    条目数超过 max_entries 时从最早的时间戳开始淘汰，保证内存有界。
+    get_interpolated_* 直接返回缓存对象（不拷贝），调用方需视为只读。
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        # 有序时间戳（连续内存，无逐个float装箱），用于二分查找最近邻
+        self._audio_ts = array('d')
+        self._video_ts = array('d')
+        self._audio_feats: List[Dict] = []
+        self._video_feats: List[Dict] = []
         logger.info("💾 初始化事件驱动缓存")
     
+    @staticmethod
+    def _find_closest(sorted_ts: array, timestamp: float) -> Optional[int]:
+        """二分查找最接近的缓存时间戳，返回其下标"""
+        if not sorted_ts:
+            return None
+        
+        i = bisect.bisect_left(sorted_ts, timestamp)
+        if i == 0:
+            return 0
+        if i == len(sorted_ts):
+            return i - 1
+        
+        return i - 1 if timestamp - sorted_ts[i - 1] <= sorted_ts[i] - timestamp else i
+    
+    def _store(self, sorted_ts: array, feats: List[Dict], timestamp: float, value: Dict):
+        """按时间戳有序插入（同一时间戳则覆盖），超出容量时淘汰最早的条目"""
+        i = bisect.bisect_left(sorted_ts, timestamp)
+        if i < len(sorted_ts) and sorted_ts[i] == timestamp:
+            feats[i] = value
+            return
+        
+        sorted_ts.insert(i, timestamp)
+        feats.insert(i, value)
+        
+        overflow = len(sorted_ts) - self.max_entries
+        if overflow > 0:
+            del sorted_ts[:overflow]
+            del feats[:overflow]
+    
     def get_interpolated_audio(self, timestamp: float, n_points: int) -> Optional[Dict]:
         """获取插值音频特征"""
         # 简单的最近邻插值
-        if not self.audio_cache:
+        i = self._find_closest(self._audio_ts, timestamp)
+        if i is None:
             return None
         
-        closest_time = min(self.audio_cache.keys(), key=lambda t: abs(t - timestamp))
+        closest_time = self._audio_ts[i]
         if abs(closest_time - timestamp) < 2.0:  # 2秒内的缓存有效
-            cached_features = self.audio_cache[closest_time].copy()
-            logger.debug(f"📋 使用缓存音频特征 {closest_time:.2f}s -> {timestamp:.2f}s")
-            return cached_features
+            logger.debug("📋 使用缓存音频特征 %.2fs -> %.2fs", closest_time, timestamp)
+            return self._audio_feats[i]
         
         return None
     
     def get_interpolated_video(self, timestamp: float) -> Optional[Dict]:
         """获取插值视频特征"""
-        if not self.video_cache:
+        i = self._find_closest(self._video_ts, timestamp)
+        if i is None:
             return None
         
-        closest_time = min(self.video_cache.keys(), key=lambda t: abs(t - timestamp))
+        closest_time = self._video_ts[i]
         if abs(closest_time - timestamp) < 2.0:  # 2秒内的缓存有效
-            cached_features = self.video_cache[closest_time].copy()
-            logger.debug(f"📋 使用缓存视频特征 {closest_time:.2f}s -> {timestamp:.2f}s")
-            return cached_features
+            logger.debug("📋 使用缓存视频特征 %.2fs -> %.2fs", closest_time, timestamp)
+            return self._video_feats[i]
         
         return None
     
     def store_audio_features(self, timestamp: float, features: Dict):
         """存储音频特征"""
         if features and "sound" in features:
-            self.audio_cache[timestamp] = features["sound"]
-            logger.debug(f"💾 缓存音频特征 {timestamp:.2f}s")
+            self._store(self._audio_ts, self._audio_feats, timestamp, features["sound"])
+            logger.debug("💾 缓存音频特征 %.2fs", timestamp)
     
     def store_video_features(self, timestamp: float, features: Dict):
         """存储视频特征"""
         if features and "face" in features:
-            self.video_cache[timestamp] = features["face"]
-            logger.debug(f"💾 缓存视频特征 {timestamp:.2f}s")
+            self._store(self._video_ts, self._video_feats, timestamp, features["face"])
+            logger.debug("💾 缓存视频特征 %.2fs", timestamp)
+    
+    @staticmethod
+    def _evict_before(sorted_ts: array, feats: List[Dict], cutoff_time: float) -> int:
+        """按时间顺序从前端淘汰早于cutoff的条目，返回淘汰数量"""
+        k = bisect.bisect_left(sorted_ts, cutoff_time)
+        del sorted_ts[:k]
+        del feats[:k]
+        return k
     
     def cleanup_old_cache(self, current_time: float, max_age: float):
         """清理过期缓存"""
         cutoff_time = current_time - max_age
         
-        # 清理音频缓存
-        old_audio_count = len(self.audio_cache)
-        self.audio_cache = {t: f for t, f in self.audio_cache.items() if t >= cutoff_time}
-        
-        # 清理视频缓存
-        old_video_count = len(self.video_cache)
-        self.video_cache = {t: f for t, f in self.video_cache.items() if t >= cutoff_time}
-        
-        cleaned_audio = old_audio_count - len(self.audio_cache)
-        cleaned_video = old_video_count - len(self.video_cache)
+        # 只淘汰过期条目，不重建容器
+        cleaned_audio = self._evict_before(self._audio_ts, self._audio_feats, cutoff_time)
+        cleaned_video = self._evict_before(self._video_ts, self._video_feats, cutoff_time)
         
         if cleaned_audio > 0 or cleaned_video > 0:
             logger.info(f"🧹 清理缓存: 音频{cleaned_audio}个, 视频{cleaned_video}个")
 
+# =============================================================================
+# 段落分析工作进程
+# =============================================================================
+
+def _run_prosody(analyzer, audio_path: str, start_ms: int, end_ms: int, n_points: int) -> Dict:
+    """执行韵律分析（分析器缺少analyze_segment时退回模拟实现）"""
+    if hasattr(analyzer, 'analyze_segment'):
+        return analyzer.analyze_segment(audio_path, start_ms, end_ms, n_points=n_points)
+    return MockProsodyAnalyzer.analyze_segment(audio_path, start_ms, end_ms, n_points)
+
+def _run_facial(analyzer, video_path: str, start_ms: int, end_ms: int) -> Dict:
+    """执行面部分析（分析器缺少analyze_segment时退回模拟实现）"""
+    if hasattr(analyzer, 'analyze_segment'):
+        return analyzer.analyze_segment(video_path, start_ms, end_ms)
+    return MockFacialAnalyzer.analyze_segment(video_path, start_ms, end_ms)
+
+# 工作进程内的分析器实例（由主进程的分析器pickle而来，每个进程初始化一次）
+_worker_prosody = None
+_worker_facial = None
+
+def _init_worker(prosody_analyzer, facial_analyzer):
+    """工作进程初始化：限制BLAS为单线程，并保存主进程传入的分析器"""
+    global _worker_prosody, _worker_facial
+    if HAS_THREADPOOLCTL:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    
+    _worker_prosody = prosody_analyzer
+    _worker_facial = facial_analyzer
+
+def _analyze_features_worker(audio_path: str, video_path: str, start_ms: int, end_ms: int,
+                             n_points: int) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """在工作进程中执行韵律+面部分析（参数仅含路径和毫秒偏移）。
+    两项分析互相独立，失败的一项返回None，由主进程替换为默认特征"""
+    try:
+        sound_features = _run_prosody(_worker_prosody, audio_path, start_ms, end_ms, n_points)
+    except Exception as e:
+        logger.error(f"韵律分析失败: {e}")
+        sound_features = None
+    
+    try:
+        face_features = _run_facial(_worker_facial, video_path, start_ms, end_ms)
+    except Exception as e:
+        logger.error(f"面部分析失败: {e}")
+        face_features = None
+    
+    return sound_features, face_features
+
 # =============================================================================
 # 主分析器类
 # =============================================================================
@@ -369,25 +626,34 @@ class MultiModalAnalyzer_Optimized:
             if enable_segmentation:
                 logger.info("使用模拟暂停检测器")
         
-        # 优化组件
-        if HAS_EVENT_DETECTOR:
-            self.detector = LightweightDetector()
-            self.cache = EventDrivenCache()
-        else:
-            self.detector = LightweightDetector()
-            self.cache = EventDrivenCache()
-            logger.info("使用默认事件检测和缓存")
-        
         self.enable_segmentation = enable_segmentation
         self.segmentation_mode = segmentation_mode
         
-        # 初始化人脸级联分类器（避免重复创建）
+        # 初始化人脸检测器（避免重复创建）：优先YuNet INT8模型，模型缺失时退回Haar级联
+        self._use_opencl = False
+        self.face_detector = None
+        self.face_cascade = None
         try:
-            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            if self.face_cascade.empty():
-                raise ValueError("人脸级联分类器加载失败")
+            cv2 = _cv2()
+            if hasattr(cv2, 'FaceDetectorYN') and os.path.exists(YUNET_MODEL_PATH):
+                self.face_detector = cv2.FaceDetectorYN.create(
+                    YUNET_MODEL_PATH, "", _FACE_INPUT_SIZE, score_threshold=0.7
+                )
+                logger.info("人脸检测器: YuNet (INT8)")
+            else:
+                logger.warning(f"⚠️ YuNet模型不可用({YUNET_MODEL_PATH})，使用Haar级联")
+                self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+                if self.face_cascade.empty():
+                    raise ValueError("人脸级联分类器加载失败")
+                
+                # 有OpenCL设备时走T-API（UMat）加速级联检测，否则保持CPU路径
+                if cv2.ocl.haveOpenCL():
+                    cv2.ocl.setUseOpenCL(True)
+                    self._use_opencl = cv2.ocl.useOpenCL()
+                logger.info(f"人脸检测后端: {'OpenCL' if self._use_opencl else 'CPU'}")
         except Exception as e:
             logger.warning(f"人脸检测器初始化失败: {e}")
+            self.face_detector = None
             self.face_cascade = None
         
         # 优化配置
@@ -397,27 +663,76 @@ class MultiModalAnalyzer_Optimized:
             "vad_pause_cut_s": 0.4,
             "snap_tolerance_ms": 120,
             "prosody_points": 15,
+            "merge_max_s": 3.0,                 # 相邻短段落合并后的最大时长
+            "audio_sr": 16000,                  # 提取音频的目标采样率
             
             # 事件驱动配置
             "analysis_window_s": 2.0,           # 分析窗口时长
             "trigger_threshold": 0.5,           # 触发阈值
             "cache_max_age_s": 300.0,           # 缓存最大年龄
+            "cache_max_entries": 512,           # 缓存最大条目数（音频/视频各自）
+            "cache_cleanup_every": 32,          # 每处理N个段落清理一次过期缓存
             "min_recompute_interval_s": 0.5,    # 最小重计算间隔
             "parallel_precompute": True,        # 并行预计算
+            "analysis_workers": os.cpu_count() or 4,  # 段落分析线程数
+            # 真实韵律分析（librosa/BLAS）启用段落分析进程池，0表示仅用线程池
+            "analysis_processes": (os.cpu_count() or 4) if HAS_PROSODY_ANALYZER else 0,
+            
+            # 磁盘缓存（按内容哈希复用ASR/VAD/提取的音频）
+            "disk_cache_dir": os.path.join(os.path.expanduser("~"), ".cache", "realtime-multimodal"),
         }
         
+        # 优化组件
+        self.detector = LightweightDetector()
+        self.cache = EventDrivenCache(max_entries=self.CFG["cache_max_entries"])
+        if not HAS_EVENT_DETECTOR:
+            logger.info("使用默认事件检测和缓存")
+        
+        # 默认特征只构建一次，所有段落共享（只读）
+        n_points = self.CFG["prosody_points"]
+        self._default_sound = {
+            "pitch": [0.0] * n_points,
+            "rate": [0.0] * n_points, 
+            "level": [0.0] * n_points
+        }
+        self._default_face = {
+            "Smile": [0.0, 0.0],
+            "Mouth": [0.0, 0.0],
+            "EAR": [0.0, 0.0],
+            "Brow": [0.0, 0.0],
+            "Yaw": [0.0, 0.0],
+            "Pitch": [0.0, 0.0],
+            "Roll": [0.0, 0.0]
+        }
+        
+        # 长期复用的段落分析线程池（避免每段临时创建）
+        self._pool = ThreadPoolExecutor(max_workers=self.CFG["analysis_workers"])
+        
+        # 可选的段落分析进程池：首次使用时按当前分析器创建（见 _get_proc_pool）
+        self._proc_pool = None
+        self._proc_pool_analyzers = None
+        self._proc_pool_lock = threading.Lock()
+        
         # 预计算缓存
+        self._source_counts = Counter()  # 最近一次处理的段落来源计数
+        self._cache_key = None  # 当前音频的内容哈希，None表示不使用磁盘缓存
         self._precomputed_audio = None
-        self._precomputed_face_cache = {}
+        self._face_ts = np.empty(0, dtype=np.float64)                        # 采样帧时间戳 (N,)
+        self._face_feats = np.empty((0, _FACE_FEAT_COLS), dtype=np.float32)  # 特征 (N, 特征数×2)
         self._precomputed_vad = None
+        self._vad_result_cache: Dict[str, Dict] = {}
+        self._vad_lock = threading.Lock()
         
         logger.info("✅ 多模态分析器初始化完成")
         
     def analyze_video_audio(self, video_path: str, audio_path: str = None, 
-                           extract_audio: bool = True) -> Dict:
+                           extract_audio: bool = True, cache: bool = True) -> Dict:
         """
         优化的多模态分析主流程
         采用: P0预计算 + P1ASR并行 + P2事件驱动 + P3缓存聚合
+        
+        Args:
+            cache: 是否按文件内容哈希复用磁盘上的提取音频、ASR和VAD结果
         """
         logger.info("🚀 启动优化的多模态分析...")
         start_time = time.time()
@@ -429,9 +744,19 @@ class MultiModalAnalyzer_Optimized:
             
             # 准备音频路径
             if audio_path is None and extract_audio:
-                audio_path = self._extract_audio(video_path)
+                cached_wav = self._disk_cache_path(_content_key(video_path), "wav") if cache else None
+                audio_path = self._extract_audio(video_path, cached_wav)
             elif audio_path is None:
                 audio_path = video_path
+            
+            # ASR/VAD 结果按音频内容缓存（无法计算哈希时不使用磁盘缓存）
+            self._cache_key = None
+            if cache:
+                try:
+                    self._cache_key = _content_key(audio_path)
+                except OSError as e:
+                    logger.warning(f"⚠️ 无法计算音频内容哈希，跳过磁盘缓存: {e}")
+            self._vad_result_cache.clear()
                 
             # **阶段P0: 并行预计算**
             logger.info("📊 P0: 启动并行预计算...")
@@ -473,8 +798,8 @@ class MultiModalAnalyzer_Optimized:
                 "summary": {
                     "total_duration": precomputed_audio.get("duration", 0),
                     "segment_count": len(segments),
-                    "asr_segments": len([s for s in segments if s.get("meta", {}).get("source") == "ASR_PUNCT"]),
-                    "vad_fallback_segments": len([s for s in segments if s.get("meta", {}).get("source") == "VAD_FALLBACK"]),
+                    "asr_segments": self._source_counts["ASR_PUNCT"],
+                    "vad_fallback_segments": self._source_counts["VAD_FALLBACK"],
                     "segmentation_mode": self.segmentation_mode,
                     "performance": {
                         "total_time_s": total_time,
@@ -505,6 +830,80 @@ class MultiModalAnalyzer_Optimized:
                 }
             }
     
+    def _get_proc_pool(self) -> Optional[ProcessPoolExecutor]:
+        """获取段落分析进程池，None表示使用线程池。
+        进程池绑定创建时的分析器实例：实例被替换时重建，无法pickle时退回线程池"""
+        if self.CFG["analysis_processes"] <= 0:
+            return None
+        
+        analyzers = (self.prosody_analyzer, self.facial_analyzer)
+        with self._proc_pool_lock:
+            if (self._proc_pool_analyzers is not None and
+                    all(a is b for a, b in zip(analyzers, self._proc_pool_analyzers))):
+                return self._proc_pool
+            
+            if self._proc_pool is not None:
+                self._proc_pool.shutdown(wait=False)
+                self._proc_pool = None
+            self._proc_pool_analyzers = analyzers
+            
+            try:
+                pickle.dumps(analyzers)
+            except Exception as e:
+                logger.warning(f"⚠️ 分析器无法传入工作进程，使用线程池: {e}")
+                return None
+            
+            # spawn启动（避免fork继承锁/CUDA上下文），每进程BLAS单线程
+            self._proc_pool = ProcessPoolExecutor(
+                max_workers=self.CFG["analysis_processes"],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=analyzers
+            )
+            return self._proc_pool
+    
+    def close(self):
+        """释放段落分析线程池/进程池"""
+        self._pool.shutdown(wait=True)
+        if self._proc_pool is not None:
+            self._proc_pool.shutdown(wait=True)
+    
+    def _disk_cache_path(self, key: str, kind: str) -> str:
+        """磁盘缓存文件路径"""
+        cache_dir = self.CFG["disk_cache_dir"]
+        os.makedirs(cache_dir, exist_ok=True)
+        return os.path.join(cache_dir, f"{key}.{kind}")
+    
+    def _load_disk_cache(self, kind: str):
+        """读取当前音频的磁盘缓存，未命中或禁用时返回None"""
+        if self._cache_key is None:
+            return None
+        
+        path = self._disk_cache_path(self._cache_key, f"{kind}.pkl")
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            logger.info(f"💽 命中磁盘缓存: {path}")
+            return value
+        except Exception as e:
+            logger.warning(f"磁盘缓存读取失败: {e}")
+            return None
+    
+    def _save_disk_cache(self, kind: str, value):
+        """写入当前音频的磁盘缓存"""
+        if self._cache_key is None:
+            return
+        
+        try:
+            path = self._disk_cache_path(self._cache_key, f"{kind}.pkl")
+            with open(path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"磁盘缓存写入失败: {e}")
+    
     def _precompute_audio(self, audio_path: str) -> Dict:
         """P0: 预计算音频特征（修复版）"""
         logger.info("🔊 预计算音频特征...")
@@ -518,14 +917,8 @@ class MultiModalAnalyzer_Optimized:
                 vad_info = self._precompute_vad(audio_path)
                 audio_features["vad"] = vad_info
                 
-            # 获取时长（避免重复加载音频）
-            duration = self._get_audio_duration(audio_path)
-            audio_features["duration"] = duration
-            
-            # 如果需要缓存原始音频
-            if HAS_LIBROSA:
-                y, sr = librosa.load(audio_path, sr=None)
-                audio_features["raw_audio"] = (y, sr)
+            # 下游按路径读取音频，这里只需时长（读文件头，不解码整段波形）
+            audio_features["duration"] = self._get_audio_duration(audio_path)
             
             self._precomputed_audio = audio_features
             return audio_features
@@ -544,7 +937,10 @@ class MultiModalAnalyzer_Optimized:
         logger.info("📹 预计算视频特征...")
         
         cap = None
+        decoder = None
+        stop_event = threading.Event()
         try:
+            cv2 = _cv2()
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
                 raise ValueError(f"无法打开视频文件: {video_path}")
@@ -555,58 +951,146 @@ class MultiModalAnalyzer_Optimized:
             
             # 稀疏采样：每1秒采样一帧（提高效率）
             sample_interval = max(int(fps * 1.0), 1) if fps > 0 else 30
-            face_cache = {}
+            # SoA：时间戳与 (mean, std) 特征行分开累积，结束时转为连续数组
+            ts_list = []
+            feat_rows = []
+            
+            # 解码线程与人脸检测流水线并行（OpenCV解码和检测都会释放GIL），
+            # 有界队列防止长视频解码领先过多占用内存
+            frame_queue = queue.Queue(maxsize=16)
+            decoder = threading.Thread(
+                target=self._decode_sampled_frames,
+                args=(cap, fps, total_frames, sample_interval, frame_queue, stop_event),
+                daemon=True
+            )
+            decoder.start()
             
-            for frame_idx in range(0, total_frames, sample_interval):
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
-                if not ret:
+            # 逐帧运动量（相邻采样帧的平均灰度差），在同一次解码中顺带计算，
+            # 供事件检测按帧区间切片，避免每个段落重新打开视频
+            frame_events = np.zeros(max(total_frames, 0), dtype=np.float32)
+            prev_thumb = None
+            
+            while True:
+                item = frame_queue.get()
+                if item is None:
                     break
-                    
-                timestamp = frame_idx / fps if fps > 0 else frame_idx / 30
+                frame_idx, timestamp, frame = item
+                
+                thumb = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 48),
+                                   interpolation=cv2.INTER_AREA)
+                if prev_thumb is not None:
+                    frame_events[frame_idx] = cv2.absdiff(thumb, prev_thumb).mean() / 255.0
+                prev_thumb = thumb
                 
                 # 快速人脸检测+特征提取
                 face_features = self._extract_face_features_fast(frame)
                 if face_features is not None:
-                    face_cache[timestamp] = face_features
-                    
+                    ts_list.append(timestamp)
+                    feat_rows.append([v for key in _FACE_KEYS for v in face_features[key]])
+            
+            self._face_ts = np.asarray(ts_list, dtype=np.float64)
+            self._face_feats = np.asarray(feat_rows, dtype=np.float32).reshape(-1, _FACE_FEAT_COLS)
+            
             video_features = {
-                "face_cache": face_cache,
+                "face_ts": self._face_ts,
+                "face_feats": self._face_feats,
+                "frame_events": frame_events,
                 "fps": fps,
                 "total_frames": total_frames,
                 "duration": duration
             }
             
-            self._precomputed_face_cache = face_cache
-            logger.info(f"✅ 预计算视频特征完成，采样{len(face_cache)}个关键帧")
+            logger.info(f"✅ 预计算视频特征完成，采样{len(ts_list)}个关键帧")
             return video_features
             
         except Exception as e:
             logger.error(f"视频预计算失败: {e}")
+            self._face_ts = np.empty(0, dtype=np.float64)
+            self._face_feats = np.empty((0, _FACE_FEAT_COLS), dtype=np.float32)
             return {
-                "face_cache": {},
+                "face_ts": self._face_ts,
+                "face_feats": self._face_feats,
+                "frame_events": np.zeros(0, dtype=np.float32),
                 "fps": 30,
                 "total_frames": 0,
                 "duration": 0,
                 "error": str(e)
             }
         finally:
+            stop_event.set()
+            if decoder is not None:
+                decoder.join()
             if cap is not None:
                 cap.release()
     
+    @staticmethod
+    def _decode_sampled_frames(cap, fps: float, total_frames: int, sample_interval: int,
+                               frame_queue: queue.Queue, stop_event: threading.Event):
+        """解码线程：顺序解码并把采样帧 (frame_idx, timestamp, frame) 放入队列，结束时放入None"""
+        try:
+            # 顺序解码：grab() 只解码不转换，仅采样帧才 retrieve()，避免逐帧seek引起的GOP重解码
+            frame_idx = 0
+            while frame_idx < total_frames and not stop_event.is_set() and cap.grab():
+                if frame_idx % sample_interval == 0:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    
+                    timestamp = frame_idx / fps if fps > 0 else frame_idx / 30
+                    
+                    # 消费端提前退出时不再阻塞
+                    while not stop_event.is_set():
+                        try:
+                            frame_queue.put((frame_idx, timestamp, frame), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                
+                frame_idx += 1
+        except Exception as e:
+            logger.warning(f"视频解码线程异常: {e}")
+        finally:
+            while not stop_event.is_set():
+                try:
+                    frame_queue.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    
+    def _cached_vad(self, audio_path: str) -> Dict:
+        """运行VAD检测（按音频路径缓存，预计算与兜底分段共享同一结果）"""
+        # 加锁：并行预计算时，ASR兜底分段会等待正在进行的VAD而不是重复计算
+        with self._vad_lock:
+            result = self._vad_result_cache.get(audio_path)
+            if result is not None:
+                return result
+            
+            cache_kind = f"vad-{type(self.pause_detector).__name__}"
+            result = self._load_disk_cache(cache_kind)
+            if result is None:
+                result = self.pause_detector.detect_pauses_from_file(audio_path)
+                self._save_disk_cache(cache_kind, result)
+            
+            self._vad_result_cache[audio_path] = result
+            return result
+    
     def _precompute_vad(self, audio_path: str) -> Dict:
         """P0: 预计算VAD信息"""
         logger.info("🎙️ 预计算VAD信息...")
         
         try:
-            result = self.pause_detector.detect_pauses_from_file(audio_path)
+            result = self._cached_vad(audio_path)
             speech_segments = result['speech_segments']
             pause_segments = result['pause_segments']
             
+            timeline = self._build_vad_timeline(pause_segments)
             vad_info = {
                 "speech_segments": speech_segments,
                 "pause_segments": pause_segments,
-                "timeline": self._build_vad_timeline(speech_segments, pause_segments)
+                "timeline": timeline,
+                "pause_midpoints": np.array(
+                    [(start + end) / 2 for start, end in timeline], dtype=np.float64
+                )
             }
             
             self._precomputed_vad = vad_info
@@ -617,16 +1101,24 @@ class MultiModalAnalyzer_Optimized:
             return {
                 "speech_segments": [],
                 "pause_segments": [],
-                "timeline": {}
+                "timeline": [],
+                "pause_midpoints": np.empty(0, dtype=np.float64)
             }
     
     def _run_asr_segmentation(self, audio_path: str) -> List[Dict]:
         """P1: ASR分段（可并行执行）"""
         logger.info("🗣️ P1: 执行ASR分段...")
         
+        cache_kind = f"asr-{type(self.asr_client).__name__}"
+        segments = self._load_disk_cache(cache_kind)
+        if segments is not None:
+            return segments
+        
         try:
             segments = self.asr_client.transcribe_and_segment(audio_path)
             logger.info(f"✅ ASR分段完成，获得{len(segments)}个初始段落")
+            # 只缓存ASR成功的结果，VAD兜底结果不缓存
+            self._save_disk_cache(cache_kind, segments)
             return segments
         except Exception as e:
             logger.warning(f"ASR分段失败: {e}，使用VAD兜底")
@@ -639,6 +1131,7 @@ class MultiModalAnalyzer_Optimized:
         logger.info("🎯 开始事件驱动处理...")
         
         processed_segments = []
+        source_counts = self._source_counts = Counter()
         analysis_window = self.CFG["analysis_window_s"]
         
         # 🔧 修复1: 初始化 total_end_s，避免 UnboundLocalError
@@ -652,69 +1145,104 @@ class MultiModalAnalyzer_Optimized:
             return processed_segments
         
         try:
-            for seg_idx, asr_seg in enumerate(asr_segments):
-                start_ms = asr_seg.get("start_ms", 0)
-                end_ms = asr_seg.get("end_ms", start_ms + 3000)
-                start_s = start_ms / 1000.0
-                end_s = end_ms / 1000.0
-                
-                # 🔧 修复3: 跟踪最大结束时间
-                total_end_s = max(total_end_s, end_s)
+            # 触发完整分析的子段落提交到线程池并行计算；缓存插值依赖前序段落写入的缓存，
+            # 因此结果按提交顺序在主线程中依次消费，保持与串行处理相同的语义和输出顺序
+            with ThreadPoolExecutor(max_workers=self.CFG["analysis_workers"]) as executor:
+                # (处理方式, 段落, 开始秒, 结束秒, 完整分析future, 合并前的原段落或None)
+                plan = []
                 
-                logger.info(f"处理段落 {seg_idx+1}/{len(asr_segments)}: {start_s:.2f}-{end_s:.2f}s")
+                # 相邻短段落合并为一个分析窗口，分析后再按时间切回原段落
+                units = self._merge_short_segments(asr_segments)
                 
-                try:
-                    # 检查是否超长需要VAD细分
-                    if ((end_s - start_s) > self.CFG["max_segment_s"] or 
-                        len(asr_seg.get("text", "")) > self.CFG["max_chars"]):
-                        sub_segments = self._vad_split_segment_cached(start_s, end_s, asr_seg)
-                    else:
-                        sub_segments = [asr_seg]
+                for seg_idx, (asr_seg, members) in enumerate(units):
+                    start_ms = asr_seg.get("start_ms", 0)
+                    end_ms = asr_seg.get("end_ms", start_ms + 3000)
+                    start_s = start_ms / 1000.0
+                    end_s = end_ms / 1000.0
                     
-                    # 处理每个子段落
-                    for sub_seg in sub_segments:
-                        sub_start_s = sub_seg.get("start_ms", 0) / 1000.0
-                        sub_end_s = sub_seg.get("end_ms", sub_start_s * 1000 + 3000) / 1000.0
-                        
-                        # 🔧 修复4: 更新总结束时间
-                        total_end_s = max(total_end_s, sub_end_s)
+                    # 🔧 修复3: 跟踪最大结束时间
+                    total_end_s = max(total_end_s, end_s)
+                    
+                    logger.info(f"处理段落 {seg_idx+1}/{len(units)}: {start_s:.2f}-{end_s:.2f}s")
+                    
+                    try:
+                        # 检查是否超长需要VAD细分
+                        if ((end_s - start_s) > self.CFG["max_segment_s"] or 
+                            len(asr_seg.get("text", "")) > self.CFG["max_chars"]):
+                            sub_segments = self._vad_split_segment_cached(start_s, end_s, asr_seg)
+                        else:
+                            sub_segments = [asr_seg]
                         
-                        try:
-                            # **事件驱动检测**
-                            events = self._detect_events_in_segment(
-                                sub_start_s, sub_end_s, video_path, precomputed_audio, precomputed_video
-                            )
+                        # 处理每个子段落
+                        for sub_seg in sub_segments:
+                            sub_start_s = sub_seg.get("start_ms", 0) / 1000.0
+                            sub_end_s = sub_seg.get("end_ms", sub_start_s * 1000 + 3000) / 1000.0
                             
-                            trigger_info = self.detector.should_trigger_analysis(events, sub_start_s)
+                            # 🔧 修复4: 更新总结束时间
+                            total_end_s = max(total_end_s, sub_end_s)
                             
-                            # 根据触发结果决定处理策略
-                            if trigger_info["should_trigger"]:
-                                logger.info(f"🔥 触发重运算 {sub_start_s:.2f}s: {trigger_info['reasons']}")
-                                # 执行完整分析并缓存
-                                segment_result = self._analyze_segment_full(
-                                    sub_seg, audio_path, video_path, sub_start_s, sub_end_s
+                            try:
+                                # **事件驱动检测**
+                                events = self._detect_events_in_segment(
+                                    sub_start_s, sub_end_s, video_path, precomputed_audio, precomputed_video
                                 )
-                                self._cache_segment_features(sub_start_s, segment_result)
-                            else:
-                                logger.info(f"📋 使用缓存插值 {sub_start_s:.2f}s")
-                                # 使用缓存插值
-                                segment_result = self._analyze_segment_cached(
-                                    sub_seg, sub_start_s, sub_end_s
-                                )
-                            
-                            processed_segments.append(segment_result)
-                            
-                        except Exception as e:
-                            logger.error(f"❌ 处理子段落 {sub_start_s:.2f}-{sub_end_s:.2f}s 失败: {e}")
-                            # 🔧 修复5: 添加容错机制，创建默认段落
-                            default_segment = self._create_default_segment(sub_seg, sub_start_s, sub_end_s)
-                            processed_segments.append(default_segment)
-                            
-                except Exception as e:
-                    logger.error(f"❌ 处理段落 {seg_idx+1} 失败: {e}")
-                    # 创建默认段落继续处理
-                    default_segment = self._create_default_segment(asr_seg, start_s, end_s)
-                    processed_segments.append(default_segment)
+                                
+                                trigger_info = self.detector.should_trigger_analysis(events, sub_start_s)
+                                
+                                # 根据触发结果决定处理策略
+                                if trigger_info["should_trigger"]:
+                                    logger.info(f"🔥 触发重运算 {sub_start_s:.2f}s: {trigger_info['reasons']}")
+                                    # 执行完整分析（并行），消费时再缓存
+                                    future = executor.submit(
+                                        self._analyze_segment_full,
+                                        sub_seg, audio_path, video_path, sub_start_s, sub_end_s
+                                    )
+                                    plan.append(("full", sub_seg, sub_start_s, sub_end_s, future, members))
+                                else:
+                                    plan.append(("cached", sub_seg, sub_start_s, sub_end_s, None, members))
+                                
+                            except Exception as e:
+                                logger.error(f"❌ 处理子段落 {sub_start_s:.2f}-{sub_end_s:.2f}s 失败: {e}")
+                                # 🔧 修复5: 添加容错机制，创建默认段落
+                                plan.append(("default", sub_seg, sub_start_s, sub_end_s, None, members))
+                                
+                    except Exception as e:
+                        logger.error(f"❌ 处理段落 {seg_idx+1} 失败: {e}")
+                        # 创建默认段落继续处理
+                        plan.append(("default", asr_seg, start_s, end_s, None, members))
+                
+                # 按原始顺序汇总结果
+                cleanup_every = self.CFG["cache_cleanup_every"]
+                for plan_idx, (mode, seg, seg_start_s, seg_end_s, future, members) in enumerate(plan):
+                    # 周期性清理过期缓存，使内存占用跟随分析窗口而非整段录音
+                    if plan_idx and plan_idx % cleanup_every == 0:
+                        self.cache.cleanup_old_cache(seg_start_s, self.CFG["cache_max_age_s"])
+                    
+                    try:
+                        if mode == "full":
+                            segment_result = future.result()
+                            self._cache_segment_features(seg_start_s, segment_result)
+                        elif mode == "cached":
+                            logger.info(f"📋 使用缓存插值 {seg_start_s:.2f}s")
+                            # 使用缓存插值
+                            segment_result = self._analyze_segment_cached(seg, seg_start_s, seg_end_s)
+                        else:
+                            segment_result = self._create_default_segment(seg, seg_start_s, seg_end_s)
+                        
+                    except Exception as e:
+                        logger.error(f"❌ 处理子段落 {seg_start_s:.2f}-{seg_end_s:.2f}s 失败: {e}")
+                        segment_result = self._create_default_segment(seg, seg_start_s, seg_end_s)
+                    
+                    if members is not None:
+                        segment_results = self._split_merged_result(segment_result, members,
+                                                                    seg_start_s, seg_end_s)
+                    else:
+                        segment_results = (segment_result,)
+                    
+                    for segment_result in segment_results:
+                        processed_segments.append(segment_result)
+                        # 追加时顺带统计来源，汇总时无需再扫描段落列表
+                        source_counts[segment_result.get("meta", {}).get("source")] += 1
         
         except Exception as e:
             logger.error(f"❌ 段落处理循环失败: {e}")
@@ -729,6 +1257,82 @@ class MultiModalAnalyzer_Optimized:
         
         return processed_segments
     
+    def _merge_short_segments(self, asr_segments: List[Dict]) -> List[Tuple[Dict, Optional[List[Dict]]]]:
+        """合并相邻短段落：间隔不超过vad_pause_cut_s且合并后不超过merge_max_s/max_chars。
+        返回 (段落, 原段落列表) 列表，未合并的段落原段落列表为None"""
+        gap_ms = self.CFG["vad_pause_cut_s"] * 1000
+        max_ms = self.CFG["merge_max_s"] * 1000
+        max_chars = self.CFG["max_chars"]
+        
+        def bounds(seg: Dict) -> Tuple[int, int]:
+            start_ms = seg.get("start_ms", 0)
+            return start_ms, seg.get("end_ms", start_ms + 3000)
+        
+        groups = []
+        for seg in asr_segments:
+            if groups:
+                group = groups[-1]
+                group_start = bounds(group[0])[0]
+                prev_end = bounds(group[-1])[1]
+                start_ms, end_ms = bounds(seg)
+                if (prev_end + gap_ms >= start_ms and end_ms - group_start < max_ms and
+                        sum(len(s.get("text", "")) for s in group) + len(seg.get("text", "")) <= max_chars):
+                    group.append(seg)
+                    continue
+            groups.append([seg])
+        
+        units = []
+        for group in groups:
+            if len(group) == 1:
+                units.append((group[0], None))
+                continue
+            merged = {
+                "text": "".join(s.get("text", "") for s in group),
+                "start_ms": bounds(group[0])[0],
+                "end_ms": bounds(group[-1])[1],
+                "source": group[0].get("source", "ASR_PUNCT"),
+                "punct": group[-1].get("punct", "")
+            }
+            units.append((merged, group))
+        
+        if len(units) < len(asr_segments):
+            logger.info(f"🔗 合并相邻短段落: {len(asr_segments)} -> {len(units)}")
+        return units
+    
+    def _split_merged_result(self, result: Dict, members: List[Dict],
+                             start_s: float, end_s: float) -> List[Dict]:
+        """把合并窗口的分析结果按原段落时间切回：韵律曲线按时间重采样，面部统计量共享"""
+        n_points = self.CFG["prosody_points"]
+        parts = []
+        for member in members:
+            start_ms = member.get("start_ms", 0)
+            end_ms = member.get("end_ms", start_ms + 3000)
+            query_t = np.linspace(start_ms / 1000.0, end_ms / 1000.0, n_points)
+            
+            sound = {}
+            for key, values in result.get("sound", {}).items():
+                if isinstance(values, (list, tuple, np.ndarray)) and len(values) > 1:
+                    src_t = np.linspace(start_s, end_s, len(values))
+                    sound[key] = np.interp(query_t, src_t, values).tolist()
+                else:
+                    sound[key] = values
+            
+            meta = dict(result.get("meta", {}))
+            meta["source"] = member.get("source", "ASR_PUNCT")
+            meta["original_punct"] = member.get("punct", "")
+            meta["merged_from"] = result.get("segment_id", "")
+            
+            parts.append({
+                **result,
+                "segment_id": f"seg_{start_ms:06d}_{end_ms:06d}",
+                "word": member.get("text", ""),
+                "start_ms": start_ms,
+                "end_ms": end_ms,
+                "sound": sound,
+                "meta": meta
+            })
+        return parts
+    
     def _detect_events_in_segment(self, start_s: float, end_s: float, video_path: str,
                                 precomputed_audio: Dict, precomputed_video: Dict) -> List[Dict]:
         """检测段落内的事件"""
@@ -743,7 +1347,7 @@ class MultiModalAnalyzer_Optimized:
             fps = precomputed_video.get("fps", 30)
             start_frame = int(start_s * fps)
             end_frame = int(end_s * fps)
-            video_events = self.detector.detect_video_events(video_path, start_frame, end_frame)
+            video_events = self.detector.detect_video_events(precomputed_video, start_frame, end_frame)
             events.extend(video_events)
             
         except Exception as e:
@@ -757,26 +1361,42 @@ class MultiModalAnalyzer_Optimized:
         start_ms = int(start_s * 1000)
         end_ms = int(end_s * 1000)
         
-        try:
-            # 韵律分析
-            if hasattr(self.prosody_analyzer, 'analyze_segment'):
-                sound_features = self.prosody_analyzer.analyze_segment(
-                    audio_path, start_ms, end_ms, n_points=self.CFG["prosody_points"]
-                )
-            else:
-                sound_features = MockProsodyAnalyzer.analyze_segment(
-                    audio_path, start_ms, end_ms, self.CFG["prosody_points"]
-                )
+        n_points = self.CFG["prosody_points"]
+        proc_pool = self._get_proc_pool()
+        if proc_pool is not None:
+            # 进程池路径：只传路径和毫秒偏移，分析器在工作进程初始化时传入
+            try:
+                sound_features, face_features = proc_pool.submit(
+                    _analyze_features_worker, audio_path, video_path, start_ms, end_ms, n_points
+                ).result()
+            except Exception as e:
+                logger.error(f"完整分析失败: {e}")
+                sound_features = face_features = None
+        else:
+            # 韵律分析与面部分析互不依赖，提交到共享线程池并行执行
+            sound_future = self._pool.submit(
+                _run_prosody, self.prosody_analyzer, audio_path, start_ms, end_ms, n_points
+            )
+            face_future = self._pool.submit(
+                _run_facial, self.facial_analyzer, video_path, start_ms, end_ms
+            )
             
-            # 面部分析
-            if hasattr(self.facial_analyzer, 'analyze_segment'):
-                face_features = self.facial_analyzer.analyze_segment(video_path, start_ms, end_ms)
-            else:
-                face_features = MockFacialAnalyzer.analyze_segment(video_path, start_ms, end_ms)
+            try:
+                sound_features = sound_future.result()
+            except Exception as e:
+                logger.error(f"韵律分析失败: {e}")
+                sound_features = None
             
-        except Exception as e:
-            logger.error(f"完整分析失败: {e}")
+            try:
+                face_features = face_future.result()
+            except Exception as e:
+                logger.error(f"面部分析失败: {e}")
+                face_features = None
+        
+        # 失败的一项单独替换为默认特征，不影响另一项的结果
+        if sound_features is None:
             sound_features = self._get_default_sound_features()
+        if face_features is None:
             face_features = self._get_default_face_features()
         
         # 构建结果
@@ -806,6 +1426,8 @@ class MultiModalAnalyzer_Optimized:
         # 从缓存获取插值特征
         sound_features = self.cache.get_interpolated_audio(start_s, self.CFG["prosody_points"])
         face_features = self.cache.get_interpolated_video(start_s)
+        if face_features is None:
+            face_features = self._interp_face_features(start_s)
         
         # 如果缓存为空，使用默认值
         if sound_features is None:
@@ -831,6 +1453,18 @@ class MultiModalAnalyzer_Optimized:
         
         return result
     
+    def _interp_face_features(self, timestamp: float) -> Optional[Dict]:
+        """按预计算的采样帧线性插值面部特征（无采样帧时返回None）"""
+        if len(self._face_ts) == 0:
+            return None
+        
+        row = [np.interp(timestamp, self._face_ts, self._face_feats[:, col])
+               for col in range(_FACE_FEAT_COLS)]
+        return {
+            key: [float(row[2 * k]), float(row[2 * k + 1])]
+            for k, key in enumerate(_FACE_KEYS)
+        }
+    
     def _create_default_segment(self, segment: Dict, start_s: float, end_s: float) -> Dict:
         """🔧 新增: 创建默认段落（容错机制）"""
         start_ms = int(start_s * 1000)
@@ -871,13 +1505,18 @@ class MultiModalAnalyzer_Optimized:
             return [segment]
         
         try:
-            vad_timeline = self._precomputed_vad["timeline"]
+            # 以暂停中点为候选分割点：有序数组上二分切片取 (start_s, end_s) 内的中点
+            midpoints = self._precomputed_vad["pause_midpoints"]
+            lo = np.searchsorted(midpoints, start_s, side='right')
+            hi = np.searchsorted(midpoints, end_s, side='left')
+            candidates = midpoints[lo:hi]
             
-            # 在VAD时间线中找到分割点
-            split_points = []
-            for t, vad_type in vad_timeline.items():
-                if start_s < t < end_s and vad_type == "pause":
-                    split_points.append(t)
+            # 每个子段至少1秒：间隔全部满足时直接采用，否则走贪心内核
+            gaps = np.diff(candidates, prepend=start_s)
+            if np.all(gaps > 1.0):
+                split_points = candidates.tolist()
+            else:
+                split_points = _greedy_split_points(candidates, start_s, 1.0).tolist()
             
             if not split_points:
                 return [segment]
@@ -887,13 +1526,12 @@ class MultiModalAnalyzer_Optimized:
             prev_start = start_s
             
             for split_point in split_points:
-                if split_point - prev_start > 1.0:  # 至少1秒
-                    sub_seg = segment.copy()
-                    sub_seg["start_ms"] = int(prev_start * 1000)
-                    sub_seg["end_ms"] = int(split_point * 1000)
-                    sub_seg["source"] = "VAD_SPLIT"
-                    sub_segments.append(sub_seg)
-                    prev_start = split_point
+                sub_seg = segment.copy()
+                sub_seg["start_ms"] = int(prev_start * 1000)
+                sub_seg["end_ms"] = int(split_point * 1000)
+                sub_seg["source"] = "VAD_SPLIT"
+                sub_segments.append(sub_seg)
+                prev_start = split_point
             
             # 最后一段
             if end_s - prev_start > 1.0:
@@ -911,15 +1549,27 @@ class MultiModalAnalyzer_Optimized:
     
     def _extract_face_features_fast(self, frame: np.ndarray) -> Optional[Dict]:
         """快速提取人脸特征（简化版）"""
-        if self.face_cascade is None:
+        if self.face_detector is None and self.face_cascade is None:
             return None
             
         try:
-            # 缩小帧以提高速度
-            small_frame = cv2.resize(frame, (320, 240))
+            cv2 = _cv2()
+            if self.face_detector is not None:
+                # YuNet直接接收BGR小图，输出框+5个关键点
+                small_frame = cv2.resize(frame, _FACE_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+                _, faces = self.face_detector.detect(small_frame)
+                if faces is None or len(faces) == 0:
+                    return None
+                return _landmark_features(faces[0], small_frame.shape[1], small_frame.shape[0])
             
-            # 使用已初始化的级联分类器
-            faces = self.face_cascade.detectMultiScale(small_frame, 1.1, 4)
+            # 先转灰度再缩小帧以提高速度（级联检测只需要单通道）
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # INTER_AREA 缩小时比默认双线性更快且质量更好
+            small_frame = cv2.resize(gray, _FACE_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+            
+            # 使用已初始化的级联分类器（minSize 减少金字塔层数）
+            detect_input = cv2.UMat(small_frame) if self._use_opencl else small_frame
+            faces = self.face_cascade.detectMultiScale(detect_input, 1.1, 4, minSize=(30, 30))
             
             if len(faces) == 0:
                 return None
@@ -951,81 +1601,38 @@ class MultiModalAnalyzer_Optimized:
             return None
     
     def _get_default_sound_features(self) -> Dict:
-        """获取默认音频特征"""
-        n_points = self.CFG["prosody_points"]
-        return {
-            "pitch": [0.0] * n_points,
-            "rate": [0.0] * n_points, 
-            "level": [0.0] * n_points
-        }
+        """获取默认音频特征（共享对象，调用方需视为只读）"""
+        return self._default_sound
     
     def _get_default_face_features(self) -> Dict:
-        """获取默认面部特征"""
-        return {
-            "Smile": [0.0, 0.0],
-            "Mouth": [0.0, 0.0],
-            "EAR": [0.0, 0.0],
-            "Brow": [0.0, 0.0],
-            "Yaw": [0.0, 0.0],
-            "Pitch": [0.0, 0.0],
-            "Roll": [0.0, 0.0]
-        }
+        """获取默认面部特征（共享对象，调用方需视为只读）"""
+        return self._default_face
     
-    def _build_vad_timeline(self, speech_segments: List, pause_segments: List) -> Dict:
-        """构建VAD时间线（优化版）"""
-        timeline = {}
-        
+    def _build_vad_timeline(self, pause_segments: List) -> List[Tuple[float, float]]:
+        """构建VAD时间线：按开始时间排序的暂停区间列表"""
         try:
-            # 降低时间线精度以节省内存（从0.1s改为0.5s）
-            time_step = 0.5
-            
-            for speech_seg in speech_segments:
-                start = speech_seg['start_time']
-                end = speech_seg['end_time']
-                for t in np.arange(start, end, time_step):
-                    timeline[round(t, 1)] = "speech"
-            
-            for pause_seg in pause_segments:
-                start = pause_seg['start_time']
-                end = pause_seg['end_time']
-                for t in np.arange(start, end, time_step):
-                    timeline[round(t, 1)] = "pause"
-                    
+            return sorted(
+                (pause_seg['start_time'], pause_seg['end_time'])
+                for pause_seg in pause_segments
+            )
         except Exception as e:
             logger.warning(f"VAD时间线构建失败: {e}")
-                
-        return timeline
+            return []
     
     def _get_audio_duration(self, audio_path: str) -> float:
-        """获取音频时长（避免重复加载）"""
+        """获取音频时长（只读文件头，不解码音频）"""
         try:
-            if HAS_LIBROSA:
-                y, sr = librosa.load(audio_path, sr=None)
-                return len(y) / sr
-            else:
-                # 使用ffprobe获取时长
-                return self._get_duration_ffprobe(audio_path)
+            # soundfile/ffprobe获取时长（按路径缓存）
+            return _probe_duration(audio_path)
         except Exception as e:
             logger.warning(f"获取音频时长失败: {e}")
             return 30.0  # 默认30秒
     
-    def _get_duration_ffprobe(self, audio_path: str) -> float:
-        """使用ffprobe获取音频时长"""
-        try:
-            cmd = [
-                'ffprobe', '-i', audio_path, '-show_entries', 
-                'format=duration', '-v', 'quiet', '-of', 'csv=p=0'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=10)
-            return float(result.stdout.strip())
-        except Exception as e:
-            logger.warning(f"ffprobe获取时长失败: {e}")
-            return 30.0
-    
-    def _extract_audio(self, video_path: str) -> str:
-        """从视频提取音频"""
+    def _extract_audio(self, video_path: str, audio_path: str = None) -> str:
+        """从视频提取音频（默认输出到视频同目录）"""
         logger.info("🎬 从视频提取音频...")
-        audio_path = video_path.rsplit('.', 1)[0] + "_extracted.wav"
+        if audio_path is None:
+            audio_path = video_path.rsplit('.', 1)[0] + "_extracted.wav"
         
         # 检查是否已存在
         if os.path.exists(audio_path):
@@ -1034,18 +1641,33 @@ class MultiModalAnalyzer_Optimized:
         
         try:
             # 先验证视频文件
-            cap = cv2.VideoCapture(video_path)
+            cap = _cv2().VideoCapture(video_path)
             if not cap.isOpened():
                 raise ValueError(f"无法打开视频文件: {video_path}")
             cap.release()
             
+            # 音轨已是目标PCM格式时只做流拷贝，跳过解码和重采样
+            sr = self.CFG["audio_sr"]
+            codec = _probe_audio_codec(video_path)
+            pcm_ready = (codec.get("codec_name") == "pcm_s16le" and
+                         codec.get("sample_rate") == sr and codec.get("channels") == 1)
+            
             # 使用ffmpeg提取音频
-            cmd = [
-                "ffmpeg", "-i", video_path, "-acodec", "pcm_s16le", 
-                "-ar", "16000", "-ac", "1", "-y", audio_path
-            ]
+            if pcm_ready:
+                logger.info(f"音轨已是{sr}Hz单声道PCM，流拷贝提取")
+                audio_args = ["-acodec", "copy"]
+            else:
+                audio_args = ["-acodec", "pcm_s16le", "-ar", str(sr), "-ac", "1"]
+            # 先写入同目录临时文件，成功后原子替换，避免中断/失败的半截WAV被当作缓存复用
+            tmp_path = f"{audio_path}.{os.getpid()}.tmp.wav"
+            cmd = ["ffmpeg", "-i", video_path, "-vn", *audio_args, "-y", tmp_path]
             
-            result = subprocess.run(cmd, check=True, capture_output=True, timeout=60)
+            try:
+                subprocess.run(cmd, check=True, capture_output=True, timeout=60)
+                os.replace(tmp_path, audio_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
             logger.info(f"✅ 音频提取完成: {audio_path}")
             return audio_path
             
@@ -1075,7 +1697,7 @@ class MultiModalAnalyzer_Optimized:
                     "source": "FALLBACK"
                 }]
             
-            result = self.pause_detector.detect_pauses_from_file(audio_path)
+            result = self._cached_vad(audio_path)
             speech_segments = result['speech_segments']
             
             segments = []
@@ -1112,7 +1734,11 @@ def create_analyzer(api_key: str = None, **kwargs) -> MultiModalAnalyzer_Optimiz
 def analyze_video(video_path: str, api_key: str = None, **kwargs) -> Dict:
     """便利函数：直接分析视频"""
     analyzer = create_analyzer(api_key, **kwargs)
-    return analyzer.analyze_video_audio(video_path, extract_audio=True)
+    try:
+        return analyzer.analyze_video_audio(video_path, extract_audio=True)
+    finally:
+        # 一次性分析器，用完立即释放线程池/进程池
+        analyzer.close()
 
 if __name__ == "__main__":
     # 简单测试
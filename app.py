@@ -7,6 +7,7 @@
 
 import time
 import json
+import random
 import numpy as np
 from flask import Flask, render_template_string, request
 from flask_socketio import SocketIO, emit
@@ -17,7 +18,9 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'test_key'
-socketio = SocketIO(app, cors_allowed_origins="*")
+# 安装eventlet时自动使用其协程服务器（并发WebSocket连接），否则退回Werkzeug开发服务器
+# 消息使用msgpack编码（比JSON更小、编码更快），前端需加载带msgpack解析器的客户端
+socketio = SocketIO(app, cors_allowed_origins="*", serializer='msgpack')
 
 # 简化的HTML模板（内嵌）
 HTML_TEMPLATE = '''
@@ -25,7 +28,7 @@ HTML_TEMPLATE = '''
 <html>
 <head>
     <title>最小化多模态测试</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.2/socket.io.js"></script>
+    <script src="https://cdn.socket.io/4.7.2/socket.io.msgpack.min.js"></script>
     <style>
         body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
         .container { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; }
@@ -73,6 +76,9 @@ HTML_TEMPLATE = '''
     <script>
         let socket = io();
         let mediaStream = null;
+        let audioContext = null;
+        let analyser = null;
+        let floatSamples = null;
         let isActive = false;
         
         const video = document.getElementById('video');
@@ -94,7 +100,8 @@ HTML_TEMPLATE = '''
         
         socket.on('test_result', (data) => {
             console.log('收到结果:', data);
-            updateDisplay(data);
+            // 批量音频结果只展示最新一条
+            updateDisplay(data.results ? data.results[data.results.length - 1] : data);
         });
         
         // 开始测试
@@ -108,6 +115,13 @@ HTML_TEMPLATE = '''
                 
                 video.srcObject = mediaStream;
                 
+                // 从麦克风流中读取时域样本，按块发送Int16 PCM
+                audioContext = new AudioContext();
+                analyser = audioContext.createAnalyser();
+                analyser.fftSize = 1024;
+                audioContext.createMediaStreamSource(mediaStream).connect(analyser);
+                floatSamples = new Float32Array(analyser.fftSize);
+                
                 // 启动数据发送
                 startDataCollection();
                 
@@ -129,8 +143,13 @@ HTML_TEMPLATE = '''
             if (mediaStream) {
                 mediaStream.getTracks().forEach(track => track.stop());
             }
+            if (audioContext) {
+                audioContext.close();
+                audioContext = null;
+            }
             
             isActive = false;
+            flushAudio(true);
             startBtn.disabled = false;
             stopBtn.disabled = true;
             
@@ -138,54 +157,106 @@ HTML_TEMPLATE = '''
             results.textContent = '测试已停止';
         });
         
+        // 音频分块攒批发送，摊薄每条消息的WS/TLS帧开销
+        const AUDIO_BATCH_SIZE = 4;
+        const AUDIO_FLUSH_MS = 2000;
+        // 信用控制：上一批收到audio_ack后才发下一批；超时（明显长于攒批周期）未确认则视为丢失
+        const AUDIO_ACK_TIMEOUT_MS = 3 * AUDIO_FLUSH_MS;
+        let pendingAudio = [];
+        let lastAudioFlush = Date.now();
+        let audioInFlight = false;
+        
+        socket.on('audio_ack', () => {
+            audioInFlight = false;
+        });
+        
+        function flushAudio(force = false) {
+            if (!force && audioInFlight && Date.now() - lastAudioFlush < AUDIO_ACK_TIMEOUT_MS) {
+                // 服务端尚未处理完上一批：只保留最新的一批数据，不再堆积
+                if (pendingAudio.length > AUDIO_BATCH_SIZE) {
+                    pendingAudio.splice(0, pendingAudio.length - AUDIO_BATCH_SIZE);
+                }
+                return;
+            }
+            if (pendingAudio.length > 0) {
+                socket.emit('audio_batch', pendingAudio);
+                pendingAudio = [];
+                audioInFlight = true;
+            }
+            lastAudioFlush = Date.now();
+        }
+        
+        // 视频帧画布只创建一次；支持时使用OffscreenCanvas，JPEG编码不经过DOM画布
+        const FRAME_WIDTH = 640;
+        const FRAME_HEIGHT = 480;
+        const frameCanvas = typeof OffscreenCanvas !== 'undefined'
+            ? new OffscreenCanvas(FRAME_WIDTH, FRAME_HEIGHT)
+            : Object.assign(document.createElement('canvas'), {width: FRAME_WIDTH, height: FRAME_HEIGHT});
+        const frameCtx = frameCanvas.getContext('2d');
+        
+        function encodeFrame() {
+            if (frameCanvas.convertToBlob) {
+                return frameCanvas.convertToBlob({type: 'image/jpeg', quality: 0.5});
+            }
+            return new Promise(resolve => frameCanvas.toBlob(resolve, 'image/jpeg', 0.5));
+        }
+        
         // 数据采集
         function startDataCollection() {
-            // 模拟音频数据发送
+            // 音频数据发送
             setInterval(() => {
-                if (!isActive) return;
+                if (!isActive || !audioContext) return;
                 
-                // 发送模拟音频数据
-                const audioData = new Array(1024).fill(0).map(() => Math.random() * 255);
-                socket.emit('audio_chunk', {
-                    data: audioData,
+                // 当前音频块转为Int16 PCM，以二进制发送（无需JSON编码数字数组），满一批或超时再发送
+                analyser.getFloatTimeDomainData(floatSamples);
+                const pcm = new Int16Array(floatSamples.length);
+                for (let i = 0; i < floatSamples.length; i++) {
+                    pcm[i] = Math.max(-1, Math.min(1, floatSamples[i])) * 32767;
+                }
+                pendingAudio.push({
+                    data: pcm.buffer,
+                    sr: audioContext.sampleRate,
                     timestamp: Date.now()
                 });
+                
+                if (pendingAudio.length >= AUDIO_BATCH_SIZE ||
+                    Date.now() - lastAudioFlush >= AUDIO_FLUSH_MS) {
+                    flushAudio();
+                }
             }, 500);
             
             // 模拟视频帧发送
             setInterval(() => {
                 if (!isActive) return;
                 
-                // 捕获视频帧
-                const canvas = document.createElement('canvas');
-                canvas.width = video.videoWidth || 640;
-                canvas.height = video.videoHeight || 480;
+                // 捕获视频帧（缩放到复用画布的固定尺寸）
+                frameCtx.drawImage(video, 0, 0, FRAME_WIDTH, FRAME_HEIGHT);
                 
-                const ctx = canvas.getContext('2d');
-                ctx.drawImage(video, 0, 0);
-                
-                const imageData = canvas.toDataURL('image/jpeg', 0.5);
-                socket.emit('video_frame', {
-                    data: imageData,
-                    timestamp: Date.now()
+                // JPEG以ArrayBuffer发送，Socket.IO走二进制帧，省去base64编码和解码
+                const timestamp = Date.now();
+                encodeFrame().then(blob => {
+                    if (!blob) return;
+                    return blob.arrayBuffer().then(buffer => {
+                        socket.emit('video_frame', {
+                            data: buffer,
+                            timestamp: timestamp
+                        });
+                    });
                 });
             }, 1000);
         }
         
         // 更新显示
         function updateDisplay(data) {
-            if (data.prosody) {
+            if (data.type === 'audio') {
                 document.getElementById('prosody').textContent = 
-                    `基频: ${data.prosody.pitch}Hz, 能量: ${data.prosody.energy.toFixed(3)}, 语速: ${data.prosody.rate}WPM`;
+                    `基频: ${data.pitch}Hz, 能量: ${data.energy.toFixed(3)}, 语速: ${data.rate}WPM`;
+                document.getElementById('asr').textContent = data.text;
             }
             
-            if (data.face) {
+            if (data.type === 'video') {
                 document.getElementById('face').textContent = 
-                    `表情: ${data.face.expression}, 头部姿态: ${data.face.pose}`;
-            }
-            
-            if (data.asr) {
-                document.getElementById('asr').textContent = data.asr.text;
+                    `表情: ${data.expression}, 头部姿态: ${data.pose}`;
             }
             
             // 显示原始数据
@@ -196,44 +267,88 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+AUDIO_SAMPLE_RATE = 8000           # 客户端未提供采样率时的默认值
+PITCH_MIN_HZ, PITCH_MAX_HZ = 50, 500  # 基频搜索范围
+
+def prosody_features(samples, sample_rate=AUDIO_SAMPLE_RATE):
+    """向量化计算一个音频块的RMS能量和自相关基频 (rms, pitch_hz)"""
+    rms = float(np.sqrt(np.mean(samples * samples)))
+    
+    # 自相关只取非负延迟部分，在合理基频对应的延迟区间内找峰值
+    n = len(samples)
+    centered = samples - samples.mean()
+    autocorr = np.correlate(centered, centered, mode='full')[n - 1:]
+    min_lag = int(sample_rate) // PITCH_MAX_HZ
+    max_lag = min(int(sample_rate) // PITCH_MIN_HZ, n - 1)
+    if autocorr[0] <= 0 or max_lag <= min_lag:
+        return rms, 0
+    lag = min_lag + int(np.argmax(autocorr[min_lag:max_lag + 1]))
+    return rms, int(sample_rate / lag)
+
 class MockAnalyzer:
     """模拟分析器"""
     
-    def analyze_audio(self, audio_data):
-        """模拟音频分析"""
+    # 候选值为常量元组，避免每次调用重建列表
+    EXPRESSIONS = ('neutral', 'happy', 'surprised', 'focused')
+    POSES = ('center', 'left', 'right', 'up', 'down')
+    SENTENCES = (
+        '这是一个测试句子',
+        '语音识别正在工作',
+        '多模态分析系统运行正常',
+        '实时处理音视频数据'
+    )
+    
+    def __init__(self):
+        # 标量随机数用Python的random，省去NumPy的分派和0维数组分配
+        self._rng = random.Random()
+    
+    def analyze_audio(self, audio_data, sample_rate=AUDIO_SAMPLE_RATE):
+        """音频分析：有Int16 PCM样本时计算RMS能量和自相关基频，否则返回模拟值"""
+        if audio_data:
+            samples = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)
+            rms, pitch = prosody_features(samples, sample_rate)
+            return {
+                'pitch': pitch,
+                'energy': rms / 32768.0,
+                'rate': self._rng.randint(60, 180)  # 语速无法从单个音频块估计
+            }
+        
         return {
-            'pitch': np.random.randint(100, 300),
-            'energy': np.random.random(),
-            'rate': np.random.randint(60, 180)
+            'pitch': self._rng.randint(100, 300),
+            'energy': self._rng.random(),
+            'rate': self._rng.randint(60, 180)
         }
     
     def analyze_video(self, frame_data):
         """模拟视频分析"""
-        expressions = ['neutral', 'happy', 'surprised', 'focused']
-        poses = ['center', 'left', 'right', 'up', 'down']
-        
         return {
-            'expression': np.random.choice(expressions),
-            'pose': np.random.choice(poses)
+            'expression': self._rng.choice(self.EXPRESSIONS),
+            'pose': self._rng.choice(self.POSES)
         }
     
     def mock_asr(self):
         """模拟ASR"""
-        sentences = [
-            '这是一个测试句子',
-            '语音识别正在工作',
-            '多模态分析系统运行正常',
-            '实时处理音视频数据'
-        ]
         return {
-            'text': np.random.choice(sentences),
-            'confidence': np.random.uniform(0.7, 0.9)
+            'text': self._rng.choice(self.SENTENCES),
+            'confidence': self._rng.uniform(0.7, 0.9)
         }
 
 # 全局分析器
 analyzer = MockAnalyzer()
 active_sessions = set()
 
+def analyze_audio_chunk(data):
+    """分析单个音频块，返回test_result条目"""
+    # 模拟分析音频；结果为扁平结构，减少序列化的嵌套map
+    result = analyzer.analyze_audio(data['data'], data.get('sr', AUDIO_SAMPLE_RATE))
+    asr_result = analyzer.mock_asr()
+    
+    result['type'] = 'audio'
+    result['text'] = asr_result['text']
+    result['confidence'] = asr_result['confidence']
+    result['timestamp'] = data['timestamp']
+    return result
+
 @app.route('/')
 def index():
     return render_template_string(HTML_TEMPLATE)
@@ -262,38 +377,48 @@ def handle_stop_test():
 
 @socketio.on('audio_chunk')
 def handle_audio_chunk(data):
-    if request.sid not in active_sessions:
+    # 无活动会话时直接返回，不访问请求上下文
+    if not active_sessions or request.sid not in active_sessions:
         return
     
     try:
-        # 模拟分析音频
-        audio_result = analyzer.analyze_audio(data['data'])
-        asr_result = analyzer.mock_asr()
+        emit('test_result', analyze_audio_chunk(data))
         
+    except Exception as e:
+        logger.error(f'音频处理错误: {e}')
+    finally:
+        # 处理完成后归还发送信用
+        emit('audio_ack')
+
+@socketio.on('audio_batch')
+def handle_audio_batch(batch):
+    if not active_sessions or request.sid not in active_sessions:
+        return
+    
+    try:
+        # 一批音频块只回一条聚合结果
         emit('test_result', {
-            'type': 'audio',
-            'prosody': audio_result,
-            'asr': asr_result,
-            'timestamp': data['timestamp']
+            'type': 'audio_batch',
+            'results': [analyze_audio_chunk(data) for data in batch]
         })
         
     except Exception as e:
-        logger.error(f'音频处理错误: {e}')
+        logger.error(f'音频批处理错误: {e}')
+    finally:
+        emit('audio_ack')
 
 @socketio.on('video_frame')
 def handle_video_frame(data):
-    if request.sid not in active_sessions:
+    if not active_sessions or request.sid not in active_sessions:
         return
     
     try:
-        # 模拟分析视频
+        # data['data'] 为JPEG原始字节（二进制帧），无需base64解码
         face_result = analyzer.analyze_video(data['data'])
+        face_result['type'] = 'video'
+        face_result['timestamp'] = data['timestamp']
         
-        emit('test_result', {
-            'type': 'video', 
-            'face': face_result,
-            'timestamp': data['timestamp']
-        })
+        emit('test_result', face_result)
         
     except Exception as e:
         logger.error(f'视频处理错误: {e}')
@@ -305,4 +430,5 @@ if __name__ == '__main__':
     print('  python -m http.server 8000 --bind 127.0.0.1')
     print('  然后通过代理或ngrok提供HTTPS访问')
     
-    socketio.run(app, host='127.0.0.1', port=5000, debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    logger.info(f'Socket.IO异步模式: {socketio.async_mode}')
+    socketio.run(app, host='127.0.0.1', port=5000, allow_unsafe_werkzeug=True)
\ No newline at end of file
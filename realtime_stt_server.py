@@ -4,7 +4,7 @@ RealtimeSTT WebSocket 服务器
 用于实时语音转文字，替换 Gummy ASR 方案
 
 依赖安装：
-pip install RealtimeSTT websockets asyncio
+pip install RealtimeSTT websockets asyncio orjson
 
 使用方法：
 python realtime_stt_server.py
@@ -15,8 +15,8 @@ import websockets
 import json
 import logging
 import time
+from collections import deque, namedtuple
 from threading import Thread, Event
-from queue import Queue, Empty
 from typing import Optional, Dict, Any
 import signal
 import sys
@@ -33,46 +33,88 @@ except ImportError as e:
     logger.error("Please install RealtimeSTT: pip install RealtimeSTT")
     sys.exit(1)
 
+try:
+    import orjson
+    
+    def _dumps(message: Dict[str, Any]) -> str:
+        """序列化消息为JSON文本（orjson输出UTF-8字节，解码后仍以文本帧发送）"""
+        return orjson.dumps(message).decode()
+except ImportError:
+    logger.warning("⚠️ orjson not installed, falling back to json")
+    
+    def _dumps(message: Dict[str, Any]) -> str:
+        """序列化消息为JSON文本"""
+        return json.dumps(message, ensure_ascii=False)
+
+# 固定不变的连接确认消息，只序列化一次
+_CONNECTED_FRAME = _dumps({
+    "header": {
+        "event": "proxy-connected",
+        "request_id": "server",
+        "task_id": "connection"
+    },
+    "payload": {
+        "message": "RealtimeSTT server ready"
+    }
+})
+
+
+# 语速窗口中的一条记录（元组存储，按属性访问）
+WordEntry = namedtuple('WordEntry', ['words', 'ts'])
+
 
 class RealtimeSTTServer:
     def __init__(self, host="localhost", port=8765):
         self.host = host
         self.port = port
-        self.clients = set()
+        # 每个客户端一个有界发送队列，由独立的写协程发送；慢客户端只丢弃自己最旧的消息
+        self.clients: Dict[Any, asyncio.Queue] = {}
+        self._client_writers: Dict[Any, asyncio.Task] = {}
+        self._clients_snapshot = ()  # 广播用的发送队列快照，只在注册/注销时更新
+        self._dropped_frames: Dict[asyncio.Queue, int] = {}  # 各发送队列自开始丢弃以来的丢弃条数
+        self.CLIENT_QUEUE_SIZE = 32
         self.recorder: Optional[AudioToTextRecorder] = None
         self.recording_thread: Optional[Thread] = None
         self.stop_event = Event()
-        self.text_queue = Queue()
+        # 录音线程通过 call_soon_threadsafe 投递，处理协程直接await，无需轮询
+        self.text_queue: asyncio.Queue = asyncio.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
-        # 语速计算
-        self.word_history = []
+        # 语速计算：WordEntry滑动窗口 + 窗口内词数累计
+        self.word_history = deque()
+        self._total_words = 0
         self.WPM_WINDOW_SEC = 5.0
         
         # 录音状态
         self.is_recording = False
         self.current_session_id = None
+        # 会话内不变的header字段（request_id/task_id均为会话ID）
+        self._header_template = {"request_id": "unknown", "task_id": "unknown"}
         
+    def session_header(self, event: str) -> Dict[str, str]:
+        """基于会话header模板构建事件header"""
+        return {"event": event, **self._header_template}
+    
     async def register_client(self, websocket):
         """注册客户端"""
-        self.clients.add(websocket)
+        send_queue = asyncio.Queue(maxsize=self.CLIENT_QUEUE_SIZE)
+        self.clients[websocket] = send_queue
+        self._client_writers[websocket] = asyncio.create_task(self.client_writer(websocket, send_queue))
+        self._clients_snapshot = tuple(self.clients.values())
         client_addr = websocket.remote_address
         logger.info(f"👤 Client connected: {client_addr}")
         
         # 发送连接确认
-        await self.send_to_client(websocket, {
-            "header": {
-                "event": "proxy-connected",
-                "request_id": "server",
-                "task_id": "connection"
-            },
-            "payload": {
-                "message": "RealtimeSTT server ready"
-            }
-        })
+        self.enqueue_frame(send_queue, _CONNECTED_FRAME)
     
     async def unregister_client(self, websocket):
         """注销客户端"""
-        self.clients.discard(websocket)
+        send_queue = self.clients.pop(websocket, None)
+        self._dropped_frames.pop(send_queue, None)
+        writer = self._client_writers.pop(websocket, None)
+        if writer:
+            writer.cancel()
+        self._clients_snapshot = tuple(self.clients.values())
         client_addr = getattr(websocket, 'remote_address', 'unknown')
         logger.info(f"👋 Client disconnected: {client_addr}")
         
@@ -81,9 +123,45 @@ class RealtimeSTTServer:
             await self.stop_recording()
     
     async def send_to_client(self, websocket, message: Dict[str, Any]):
-        """发送消息到客户端"""
+        """发送消息到客户端（已注册的客户端经其发送队列，保持消息顺序）"""
+        send_queue = self.clients.get(websocket)
+        if send_queue is not None:
+            self.enqueue_frame(send_queue, _dumps(message))
+        else:
+            await self.send_frame(websocket, _dumps(message))
+    
+    def enqueue_frame(self, send_queue: asyncio.Queue, frame: str):
+        """放入客户端发送队列，队列已满时丢弃最旧的消息（只在开始丢弃时告警一次）"""
+        try:
+            send_queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            send_queue.get_nowait()
+            send_queue.task_done()
+            send_queue.put_nowait(frame)
+            dropped = self._dropped_frames.get(send_queue, 0)
+            if dropped == 0:
+                logger.warning("⚠️ Client send queue full, dropping oldest messages")
+            self._dropped_frames[send_queue] = dropped + 1
+    
+    async def client_writer(self, websocket, send_queue: asyncio.Queue):
+        """客户端写协程：按顺序发送队列中的消息"""
+        while True:
+            frame = await send_queue.get()
+            try:
+                await self.send_frame(websocket, frame)
+            finally:
+                send_queue.task_done()
+            
+            # 队列排空说明客户端已跟上，汇总本轮丢弃条数
+            if send_queue.empty():
+                dropped = self._dropped_frames.pop(send_queue, 0)
+                if dropped:
+                    logger.warning(f"⚠️ Client caught up after dropping {dropped} messages")
+    
+    async def send_frame(self, websocket, frame: str):
+        """发送已序列化的消息到客户端"""
         try:
-            await websocket.send(json.dumps(message, ensure_ascii=False))
+            await websocket.send(frame)
         except websockets.exceptions.ConnectionClosed:
             logger.warning("⚠️ Client connection closed during send")
         except Exception as e:
@@ -91,11 +169,18 @@ class RealtimeSTTServer:
     
     async def broadcast_to_clients(self, message: Dict[str, Any]):
         """广播消息到所有客户端"""
-        if self.clients:
-            # 创建所有发送任务
-            tasks = [self.send_to_client(client, message) for client in self.clients.copy()]
-            # 并发执行所有发送任务
-            await asyncio.gather(*tasks, return_exceptions=True)
+        snapshot = self._clients_snapshot
+        if not snapshot:
+            return
+        
+        # 只序列化一次，所有客户端共享同一帧；入队即返回，不等待慢客户端
+        frame = _dumps(message)
+        for send_queue in snapshot:
+            self.enqueue_frame(send_queue, frame)
+        
+        # 让出事件循环，使写协程在连续广播之间有机会排空队列，
+        # 否则突发广播会在健康客户端上也触发丢弃
+        await asyncio.sleep(0)
     
     def text_callback(self, text: str):
         """RealtimeSTT的文本回调函数"""
@@ -107,23 +192,19 @@ class RealtimeSTTServer:
             word_count = len(words)
             
             # 更新词历史记录用于WPM计算
-            self.word_history.append({
-                'words': word_count,
-                'timestamp': timestamp
-            })
+            self.word_history.append(WordEntry(word_count, timestamp))
+            self._total_words += word_count
             
-            # 清理旧记录
+            # 从窗口左端移除旧记录，同步扣减累计词数
             cutoff_time = timestamp - self.WPM_WINDOW_SEC
-            self.word_history = [
-                entry for entry in self.word_history 
-                if entry['timestamp'] > cutoff_time
-            ]
+            while self.word_history and self.word_history[0].ts <= cutoff_time:
+                self._total_words -= self.word_history.popleft().words
             
             # 计算当前WPM
             current_wpm = self.calculate_wpm()
             
-            # 添加到消息队列
-            self.text_queue.put({
+            # 添加到消息队列（回调在录音线程中执行，交给事件循环线程入队）
+            self._loop.call_soon_threadsafe(self.text_queue.put_nowait, {
                 'text': text,
                 'timestamp': timestamp,
                 'wpm': current_wpm,
@@ -135,42 +216,34 @@ class RealtimeSTTServer:
         if len(self.word_history) < 2:
             return 0
             
-        total_words = sum(entry['words'] for entry in self.word_history)
-        time_span = self.word_history[-1]['timestamp'] - self.word_history[0]['timestamp']
+        time_span = self.word_history[-1].ts - self.word_history[0].ts
         
         if time_span <= 0:
             return 0
             
-        wpm = (total_words / time_span) * 60
+        wpm = (self._total_words / time_span) * 60
         return int(wpm)
     
     def start_callback(self):
         """录音开始回调"""
         logger.info("🎤 Recording started")
-        asyncio.create_task(self.broadcast_to_clients({
-            "header": {
-                "event": "recording-started",
-                "request_id": self.current_session_id or "unknown",
-                "task_id": self.current_session_id or "unknown"
-            },
+        # 回调在RealtimeSTT线程中执行，需把广播提交到服务器事件循环
+        asyncio.run_coroutine_threadsafe(self.broadcast_to_clients({
+            "header": self.session_header("recording-started"),
             "payload": {
                 "message": "Recording started"
             }
-        }))
+        }), self._loop)
     
     def stop_callback(self):
         """录音结束回调"""
         logger.info("⏹️ Recording stopped")
-        asyncio.create_task(self.broadcast_to_clients({
-            "header": {
-                "event": "recording-stopped", 
-                "request_id": self.current_session_id or "unknown",
-                "task_id": self.current_session_id or "unknown"
-            },
+        asyncio.run_coroutine_threadsafe(self.broadcast_to_clients({
+            "header": self.session_header("recording-stopped"),
             "payload": {
                 "message": "Recording stopped"
             }
-        }))
+        }), self._loop)
     
     async def start_recording(self, task_id: str, request_id: str, parameters: Dict[str, Any]):
         """启动录音和识别"""
@@ -181,6 +254,8 @@ class RealtimeSTTServer:
         try:
             logger.info("🚀 Starting RealtimeSTT recording...")
             self.current_session_id = task_id
+            self._header_template = {"request_id": task_id, "task_id": task_id}
+            self._loop = asyncio.get_running_loop()
             
             # 配置录音器参数
             recorder_config = {
@@ -274,46 +349,41 @@ class RealtimeSTTServer:
         finally:
             logger.info("🏁 Recording worker thread ended")
     
+    @staticmethod
+    def build_transcription_result(text_data: Dict[str, Any]) -> Dict[str, Any]:
+        """构建单条转录结果"""
+        return {
+            "sentence_id": int(text_data['timestamp']),
+            "begin_time": int(text_data['timestamp'] * 1000),
+            "end_time": int(text_data['timestamp'] * 1000) + 1000,
+            "text": text_data['text'],
+            "is_sentence_end": True,  # RealtimeSTT通常返回完整句子
+            "words": []  # RealtimeSTT不提供词级时间戳
+        }
+    
     async def text_processor(self):
         """处理转录文本的异步任务"""
         logger.info("📨 Text processor started")
         
-        while self.is_recording or not self.text_queue.empty():
+        while True:
+            # 阻塞等待下一条文本；None为停止录音时放入的结束标记
+            text_data = await self.text_queue.get()
+            if text_data is None:
+                break
+            
             try:
-                # 非阻塞获取文本
-                text_data = self.text_queue.get_nowait()
-                
-                # 构建并发送ASR事件
                 asr_event = {
-                    "header": {
-                        "event": "result-generated",
-                        "request_id": self.current_session_id or "unknown", 
-                        "task_id": self.current_session_id or "unknown"
-                    },
+                    "header": self.session_header("result-generated"),
                     "payload": {
-                        "transcription_result": {
-                            "sentence_id": int(text_data['timestamp']),
-                            "begin_time": int(text_data['timestamp'] * 1000),
-                            "end_time": int(text_data['timestamp'] * 1000) + 1000,
-                            "text": text_data['text'],
-                            "is_sentence_end": True,  # RealtimeSTT通常返回完整句子
-                            "words": []  # RealtimeSTT不提供词级时间戳
-                        },
-                        "usage": {
-                            "current_wpm": text_data['wpm']
-                        }
+                        "transcription_result": self.build_transcription_result(text_data),
+                        "usage": {"current_wpm": text_data['wpm']}
                     }
                 }
-                
                 await self.broadcast_to_clients(asr_event)
                 logger.info(f"📤 Sent transcription: {text_data['text']} (WPM: {text_data['wpm']})")
                 
-            except Empty:
-                # 队列为空，等待一下
-                await asyncio.sleep(0.1)
             except Exception as e:
                 logger.error(f"❌ Error processing text: {e}")
-                await asyncio.sleep(0.1)
         
         logger.info("📨 Text processor ended")
     
@@ -340,11 +410,7 @@ class RealtimeSTTServer:
         # 发送任务完成事件
         if self.current_session_id:
             await self.broadcast_to_clients({
-                "header": {
-                    "event": "task-finished",
-                    "request_id": self.current_session_id,
-                    "task_id": self.current_session_id
-                },
+                "header": self.session_header("task-finished"),
                 "payload": {
                     "message": "Recording finished"
                 }
@@ -352,15 +418,18 @@ class RealtimeSTTServer:
         
         # 重置状态
         self.current_session_id = None
+        self._header_template = {"request_id": "unknown", "task_id": "unknown"}
         self.stop_event.clear()
         self.word_history.clear()
+        self._total_words = 0
         
-        # 清空文本队列
+        # 清空文本队列，并放入结束标记让文本处理任务退出
         while not self.text_queue.empty():
             try:
                 self.text_queue.get_nowait()
-            except Empty:
+            except asyncio.QueueEmpty:
                 break
+        self.text_queue.put_nowait(None)
                 
         logger.info("✅ Recording stopped")
     
@@ -433,7 +502,10 @@ class RealtimeSTTServer:
             self.host,
             self.port,
             ping_interval=30,
-            ping_timeout=10
+            ping_timeout=10,
+            compression=None,     # 消息只有几百字节，permessage-deflate得不偿失
+            max_size=1 << 16,     # 限制单条入站消息大小，异常帧不会拖住事件循环
+            write_limit=1 << 20
         )
         
         logger.info(f"✅ RealtimeSTT server started on ws://{self.host}:{self.port}")
@@ -460,6 +532,11 @@ class RealtimeSTTServer:
                     "message": "Server is shutting down"
                 }
             })
+            # 等待各客户端发送队列清空（最多1秒）
+            await asyncio.wait(
+                [asyncio.ensure_future(send_queue.join()) for send_queue in self._clients_snapshot],
+                timeout=1.0
+            )
         
         logger.info("✅ Server shutdown complete")
 